@@ -6,13 +6,16 @@ Note: Ergast API is deprecated end of 2024. Migration to Jolpica F1 API recommen
 
 import requests
 import time
-from typing import Dict, List, Optional, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Any, Tuple
 from pathlib import Path
-import yaml
 
 from utils.logger import get_logger
 from utils.cache_manager import get_cache_manager
 from utils.rate_limiter import get_rate_limiter
+from utils.http_session import create_session, decode_json, DEFAULT_TIMEOUT
+from utils.request_coalescer import RequestCoalescer
+from utils.config_loader import load_config
 
 logger = get_logger()
 
@@ -20,6 +23,15 @@ logger = get_logger()
 class ErgastFetcher:
     """Fetches data from Ergast API."""
     
+    # Largest page size Ergast accepts
+    PAGE_LIMIT = 1000
+    
+    # Seasons are listed contiguously from here, so a year maps to an offset
+    FIRST_SEASON = 1950
+    
+    # How long a 404 is remembered before the endpoint is probed again
+    MISS_TTL = 30 * 86400
+    
     def __init__(self, config_path: str = "config/data_sources.yaml"):
         """
         Initialize Ergast fetcher.
@@ -32,14 +44,26 @@ class ErgastFetcher:
         self.rate_limiter = get_rate_limiter().get_limiter('ergast')
         
         # Load configuration
-        with open(config_path, 'r') as f:
-            config = yaml.safe_load(f)
+        config = load_config(config_path)
         
         self.base_url = config['ergast']['base_url']
+        # Rate-limit key -> base URL; mirrors get their own token bucket
+        self.hosts = {'ergast': self.base_url}
+        self.hosts.update(config['ergast'].get('mirrors') or {})
         self.endpoints = config['ergast']['endpoints']
+        # Pre-bound format_map per template for the per-race fetch paths
+        self._endpoint_fns = {
+            name: template.format_map for name, template in self.endpoints.items()
+        }
         self.rate_limit = config['ergast']['rate_limit']
+        self.max_workers = config['ergast'].get('max_workers', 4)
+        
+        # Keep-alive session so repeated calls reuse pooled connections
+        self.session = create_session()
+        # Concurrent identical requests share one HTTP call
+        self._inflight = RequestCoalescer()
         
-        self.logger.info(f"Initialized Ergast fetcher (base URL: {self.base_url})")
+        self.logger.info(f"Initialized Ergast fetcher (base URL: {self.base_url}, hosts: {len(self.hosts)})")
     
     def _make_request(
         self,
@@ -58,6 +82,7 @@ class ErgastFetcher:
         Returns:
             API response as dictionary
         """
+        # Cache on the canonical URL whichever host ends up serving it
         url = f"{self.base_url}{endpoint}"
         
         # Check cache
@@ -65,21 +90,51 @@ class ErgastFetcher:
             cached_data = self.cache.get(url, params)
             if cached_data is not None:
                 self.logger.debug(f"Cache hit for {url}")
+                if self.cache.is_miss(cached_data):
+                    return None
                 return cached_data
         
+        request_key = (url, tuple(sorted((params or {}).items())))
+        return self._inflight.run(
+            request_key,
+            lambda: self._fetch_url(endpoint, params, use_cache)
+        )
+    
+    def _fetch_url(
+        self,
+        endpoint: str,
+        params: Optional[Dict],
+        use_cache: bool
+    ) -> Optional[Dict]:
+        """
+        Perform the rate-limited HTTP request for a cache miss.
+        
+        The request goes to whichever configured host has the most
+        rate-limit capacity left.
+        
+        Args:
+            endpoint: API endpoint
+            params: Request parameters
+            use_cache: Whether to cache the response
+            
+        Returns:
+            API response as dictionary
+        """
+        cache_url = f"{self.base_url}{endpoint}"
+        
         # Rate limiting
-        self.rate_limiter._wait_if_needed('ergast')
+        host = self.rate_limiter.acquire_any(list(self.hosts))
+        url = f"{self.hosts[host]}{endpoint}"
         
         try:
-            self.rate_limiter.record_call('ergast')
-            response = requests.get(url, params=params, timeout=30)
+            response = self.session.get(url, params=params, timeout=DEFAULT_TIMEOUT)
             response.raise_for_status()
             
-            data = response.json()
+            data = decode_json(response.content)
             
             # Cache response
             if use_cache:
-                self.cache.set(url, data, params)
+                self.cache.set(cache_url, data, params)
             
             return data
         
@@ -97,6 +152,8 @@ class ErgastFetcher:
         except requests.exceptions.HTTPError as e:
             if e.response.status_code == 404:
                 self.logger.warning(f"Endpoint not found: {url} (404)")
+                if use_cache:
+                    self.cache.set_miss(cache_url, params, ttl=self.MISS_TTL)
             elif e.response.status_code >= 500:
                 self.logger.warning(f"Server error for {url}: {e.response.status_code} - API may be temporarily unavailable")
             else:
@@ -105,6 +162,73 @@ class ErgastFetcher:
         except requests.exceptions.RequestException as e:
             self.logger.error(f"Request failed for {url}: {e}")
             return None
+        except ValueError as e:
+            self.logger.error(f"Invalid JSON from {url}: {e}")
+            return None
+    
+    def _fetch_paginated(
+        self,
+        endpoint: str,
+        table: str,
+        key: str,
+        offset: int = 0,
+        max_rows: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        Fetch every page of a paginated endpoint.
+        
+        The first page reports the total row count; the remaining pages
+        are then requested concurrently.
+        
+        Args:
+            endpoint: API endpoint
+            table: MRData table name (e.g., 'DriverTable')
+            key: List key inside the table (e.g., 'Drivers')
+            offset: Row offset to start from
+            max_rows: Maximum number of rows to fetch (None = all)
+            
+        Returns:
+            List of rows from all pages
+        """
+        first_limit = min(self.PAGE_LIMIT, max_rows) if max_rows else self.PAGE_LIMIT
+        data = self._make_request(endpoint, {'offset': offset, 'limit': first_limit})
+        if not data or 'MRData' not in data:
+            return []
+        
+        table_data = data['MRData'][table]
+        if key not in table_data:
+            return []
+        
+        rows = list(table_data[key])
+        
+        # Step by the page size the server actually applied, which may be
+        # lower than requested on mirrors with a smaller cap
+        total = int(data['MRData']['total'])
+        if max_rows:
+            total = min(total, offset + max_rows)
+        page_size = int(data['MRData'].get('limit', first_limit)) or first_limit
+        offsets = range(offset + page_size, total, page_size)
+        if not offsets:
+            return rows
+        
+        def fetch_page(offset: int) -> Optional[Dict]:
+            return self._make_request(
+                endpoint,
+                {'offset': offset, 'limit': min(page_size, total - offset)}
+            )
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for page in executor.map(fetch_page, offsets):
+                if not page or 'MRData' not in page:
+                    break
+                
+                page_data = page['MRData'][table]
+                if key not in page_data:
+                    break
+                
+                rows.extend(page_data[key])
+        
+        return rows
     
     def fetch_seasons(self, start_year: Optional[int] = None, end_year: Optional[int] = None) -> List[Dict]:
         """
@@ -120,13 +244,17 @@ class ErgastFetcher:
         self.logger.info("Fetching seasons...")
         endpoint = self.endpoints['seasons']
         
-        data = self._make_request(endpoint)
-        if not data or 'MRData' not in data:
-            return []
+        # Request only the requested range; seasons are one row per year
+        offset = max(0, start_year - self.FIRST_SEASON) if start_year else 0
+        max_rows = None
+        if end_year:
+            max_rows = max(0, end_year - max(start_year or self.FIRST_SEASON, self.FIRST_SEASON) + 1)
+            if max_rows == 0:
+                return []
         
-        seasons = data['MRData']['SeasonTable']['Seasons']
+        seasons = self._fetch_paginated(endpoint, 'SeasonTable', 'Seasons', offset, max_rows)
         
-        # Filter by year range if specified
+        # Filter by year range if specified (guards against gaps in the listing)
         if start_year or end_year:
             filtered_seasons = []
             for season in seasons:
@@ -157,37 +285,16 @@ class ErgastFetcher:
             List of race dictionaries
         """
         if year:
-            endpoint = self.endpoints['races'].format(year=year)
+            endpoint = self._endpoint_fns['races']({'year': year})
             if round_num:
                 # Fetch specific race
                 endpoint = f"/{year}/{round_num}.json"
         else:
-            endpoint = "/races.json?limit=1000"
+            endpoint = "/races.json"
         
         self.logger.info(f"Fetching races for year={year}, round={round_num}...")
         
-        races = []
-        offset = 0
-        limit = 100
-        
-        while True:
-            params = {'offset': offset, 'limit': limit}
-            data = self._make_request(endpoint, params)
-            
-            if not data or 'MRData' not in data:
-                break
-            
-            race_data = data['MRData']['RaceTable']
-            if 'Races' not in race_data:
-                break
-            
-            races.extend(race_data['Races'])
-            
-            total = int(data['MRData']['total'])
-            if offset + limit >= total:
-                break
-            
-            offset += limit
+        races = self._fetch_paginated(endpoint, 'RaceTable', 'Races')
         
         self.logger.info(f"Fetched {len(races)} races")
         return races
@@ -202,28 +309,7 @@ class ErgastFetcher:
         self.logger.info("Fetching drivers...")
         endpoint = self.endpoints['drivers']
         
-        drivers = []
-        offset = 0
-        limit = 100
-        
-        while True:
-            params = {'offset': offset, 'limit': limit}
-            data = self._make_request(endpoint, params)
-            
-            if not data or 'MRData' not in data:
-                break
-            
-            driver_data = data['MRData']['DriverTable']
-            if 'Drivers' not in driver_data:
-                break
-            
-            drivers.extend(driver_data['Drivers'])
-            
-            total = int(data['MRData']['total'])
-            if offset + limit >= total:
-                break
-            
-            offset += limit
+        drivers = self._fetch_paginated(endpoint, 'DriverTable', 'Drivers')
         
         self.logger.info(f"Fetched {len(drivers)} drivers")
         return drivers
@@ -238,28 +324,7 @@ class ErgastFetcher:
         self.logger.info("Fetching constructors...")
         endpoint = self.endpoints['constructors']
         
-        constructors = []
-        offset = 0
-        limit = 100
-        
-        while True:
-            params = {'offset': offset, 'limit': limit}
-            data = self._make_request(endpoint, params)
-            
-            if not data or 'MRData' not in data:
-                break
-            
-            constructor_data = data['MRData']['ConstructorTable']
-            if 'Constructors' not in constructor_data:
-                break
-            
-            constructors.extend(constructor_data['Constructors'])
-            
-            total = int(data['MRData']['total'])
-            if offset + limit >= total:
-                break
-            
-            offset += limit
+        constructors = self._fetch_paginated(endpoint, 'ConstructorTable', 'Constructors')
         
         self.logger.info(f"Fetched {len(constructors)} constructors")
         return constructors
@@ -274,28 +339,7 @@ class ErgastFetcher:
         self.logger.info("Fetching circuits...")
         endpoint = self.endpoints['circuits']
         
-        circuits = []
-        offset = 0
-        limit = 100
-        
-        while True:
-            params = {'offset': offset, 'limit': limit}
-            data = self._make_request(endpoint, params)
-            
-            if not data or 'MRData' not in data:
-                break
-            
-            circuit_data = data['MRData']['CircuitTable']
-            if 'Circuits' not in circuit_data:
-                break
-            
-            circuits.extend(circuit_data['Circuits'])
-            
-            total = int(data['MRData']['total'])
-            if offset + limit >= total:
-                break
-            
-            offset += limit
+        circuits = self._fetch_paginated(endpoint, 'CircuitTable', 'Circuits')
         
         self.logger.info(f"Fetched {len(circuits)} circuits")
         return circuits
@@ -316,7 +360,7 @@ class ErgastFetcher:
             List of result dictionaries
         """
         self.logger.info(f"Fetching results for {year} round {round_num}...")
-        endpoint = self.endpoints['results'].format(year=year, round=round_num)
+        endpoint = self._endpoint_fns['results']({'year': year, 'round': round_num})
         
         data = self._make_request(endpoint)
         if not data or 'MRData' not in data:
@@ -354,7 +398,7 @@ class ErgastFetcher:
             List of lap time dictionaries
         """
         self.logger.info(f"Fetching lap times for {year} round {round_num}...")
-        endpoint = self.endpoints['lap_times'].format(year=year, round=round_num)
+        endpoint = self._endpoint_fns['lap_times']({'year': year, 'round': round_num})
         
         if driver_id:
             endpoint = f"/{year}/{round_num}/drivers/{driver_id}/laps.json"
@@ -399,7 +443,7 @@ class ErgastFetcher:
             List of pit stop dictionaries
         """
         self.logger.info(f"Fetching pit stops for {year} round {round_num}...")
-        endpoint = self.endpoints['pit_stops'].format(year=year, round=round_num)
+        endpoint = self._endpoint_fns['pit_stops']({'year': year, 'round': round_num})
         
         data = self._make_request(endpoint)
         if not data or 'MRData' not in data:
@@ -433,7 +477,7 @@ class ErgastFetcher:
             List of qualifying result dictionaries
         """
         self.logger.info(f"Fetching qualifying for {year} round {round_num}...")
-        endpoint = self.endpoints['qualifying'].format(year=year, round=round_num)
+        endpoint = self._endpoint_fns['qualifying']({'year': year, 'round': round_num})
         
         data = self._make_request(endpoint)
         if not data or 'MRData' not in data:
@@ -451,17 +495,88 @@ class ErgastFetcher:
         self.logger.info(f"Fetched {len(qualifying)} qualifying results")
         return qualifying
     
+    def _fetch_race_resource(
+        self,
+        data_type: str,
+        race: Dict
+    ) -> Tuple[str, str, List[Dict]]:
+        """
+        Fetch one race-specific resource (results, lap times, pit stops or qualifying).
+        
+        Args:
+            data_type: Data type (results, lap_times, pit_stops, qualifying)
+            race: Race dictionary as returned by fetch_races
+            
+        Returns:
+            Tuple of (data type, race key, fetched records)
+        """
+        year = int(race['season'])
+        round_num = int(race['round'])
+        fetch = getattr(self, f"fetch_{data_type}")
+        
+        # Lap times and pit stops are not available for all races
+        try:
+            records = fetch(year, round_num)
+        except Exception as e:
+            self.logger.warning(f"Could not fetch {data_type} for {year} round {round_num}: {e}")
+            records = []
+        
+        return data_type, f"{year}_{round_num}", records
+    
+    def _write_race_parquet(
+        self,
+        output_dir: Path,
+        data_type: str,
+        race_key: str,
+        records: List[Dict]
+    ) -> str:
+        """
+        Write one race's records for a data type to its own Parquet file.
+        
+        Args:
+            output_dir: Root output directory
+            data_type: Data type (results, lap_times, pit_stops, qualifying)
+            race_key: Race key ("{year}_{round}")
+            records: Records to write
+            
+        Returns:
+            Path of the written file
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        
+        type_dir = output_dir / data_type
+        type_dir.mkdir(parents=True, exist_ok=True)
+        path = type_dir / f"{race_key}.parquet"
+        # from_pylist takes its columns from the first record alone, which
+        # would drop optional keys (e.g. FastestLap) missing from it; build
+        # each column over all records instead, in first-seen key order
+        columns = dict.fromkeys(key for record in records for key in record)
+        table = pa.Table.from_pydict({
+            column: [record.get(column) for record in records]
+            for column in columns
+        })
+        pq.write_table(table, path)
+        return str(path)
+    
     def fetch_all_historical_data(
         self,
         start_year: Optional[int] = None,
-        end_year: Optional[int] = None
+        end_year: Optional[int] = None,
+        output_dir: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Fetch all historical data.
         
+        With output_dir set, race-specific data is written to
+        {output_dir}/{data_type}/{year}_{round}.parquet as each race
+        arrives and the returned dictionary maps race keys to file paths
+        instead of holding the records in memory.
+        
         Args:
             start_year: Start year (None = 1950)
             end_year: End year (None = current year)
+            output_dir: Directory to stream race data to as Parquet (None = keep in memory)
             
         Returns:
             Dictionary with all fetched data
@@ -486,46 +601,35 @@ class ErgastFetcher:
         data['constructors'] = self.fetch_constructors()
         data['circuits'] = self.fetch_circuits()
         
-        # Fetch races
-        if start_year and end_year:
-            for year in range(start_year, end_year + 1):
-                races = self.fetch_races(year=year)
-                data['races'].extend(races)
+        # Fetch races, one request per season in flight at once. With either
+        # bound set, only the seasons in range are requested.
+        if start_year or end_year:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                years = [int(season['season']) for season in data['seasons']]
+                for races in executor.map(lambda year: self.fetch_races(year=year), years):
+                    data['races'].extend(races)
         else:
             data['races'] = self.fetch_races()
         
-        # Fetch race-specific data
-        for race in data['races']:
-            year = int(race['season'])
-            round_num = int(race['round'])
-            
-            # Results
-            results = self.fetch_results(year, round_num)
-            data['results'][f"{year}_{round_num}"] = results
-            
-            # Lap times (may not be available for all races)
-            try:
-                lap_times = self.fetch_lap_times(year, round_num)
-                if lap_times:
-                    data['lap_times'][f"{year}_{round_num}"] = lap_times
-            except Exception as e:
-                self.logger.warning(f"Could not fetch lap times for {year} round {round_num}: {e}")
-            
-            # Pit stops (may not be available for all races)
-            try:
-                pit_stops = self.fetch_pit_stops(year, round_num)
-                if pit_stops:
-                    data['pit_stops'][f"{year}_{round_num}"] = pit_stops
-            except Exception as e:
-                self.logger.warning(f"Could not fetch pit stops for {year} round {round_num}: {e}")
-            
-            # Qualifying
-            try:
-                qualifying = self.fetch_qualifying(year, round_num)
-                if qualifying:
-                    data['qualifying'][f"{year}_{round_num}"] = qualifying
-            except Exception as e:
-                self.logger.warning(f"Could not fetch qualifying for {year} round {round_num}: {e}")
+        output_path = Path(output_dir) if output_dir else None
+        
+        # Fetch race-specific data with one task per (resource, race), so a
+        # slow multi-page lap-times fetch never holds up the other resources.
+        # The shared rate limiter still caps the overall request rate.
+        tasks = [
+            (data_type, race)
+            for race in data['races']
+            for data_type in ('results', 'lap_times', 'pit_stops', 'qualifying')
+        ]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for data_type, race_key, records in executor.map(
+                lambda task: self._fetch_race_resource(*task), tasks
+            ):
+                if not records and data_type != 'results':
+                    continue
+                if output_path is not None and records:
+                    records = self._write_race_parquet(output_path, data_type, race_key, records)
+                data[data_type][race_key] = records
         
         self.logger.info("Completed full historical data fetch")
         return data
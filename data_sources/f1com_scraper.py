@@ -5,17 +5,39 @@ Scrapes session summaries, sector times, stint data, and circuit metadata.
 
 import requests
 from bs4 import BeautifulSoup
-import re
+import lxml.html
 from typing import Dict, List, Optional, Any
-import yaml
 import json
 
+# selectolax's Lexbor parser is faster still than lxml; it is optional
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
 from utils.logger import get_logger
 from utils.cache_manager import get_cache_manager
 from utils.rate_limiter import get_rate_limiter
+from utils.http_session import create_session, decode_json, DEFAULT_TIMEOUT
+from utils.config_loader import load_config
 
 logger = get_logger()
 
+# lxml's C parser builds the tree several times faster than html.parser
+HTML_PARSER = 'lxml'
+
+# Case-insensitive class substring selectors, matched by soupsieve without
+# a per-element regex callback
+SECTOR_SECTION_SELECTOR = 'div[class*="sector" i]'
+STINT_SECTION_SELECTOR = 'div[class*="stint" i]'
+
+# Results table: CSS for selectolax, and the same match as XPath 1.0 for lxml
+RESULTS_TABLE_SELECTOR = 'table[class*="results" i]'
+RESULTS_TABLE_XPATH = (
+    '//table[contains(translate(@class, "ABCDEFGHIJKLMNOPQRSTUVWXYZ", '
+    '"abcdefghijklmnopqrstuvwxyz"), "results")]'
+)
+
 
 class F1ComScraper:
     """Scrapes data from F1.com website."""
@@ -32,16 +54,15 @@ class F1ComScraper:
         self.rate_limiter = get_rate_limiter().get_limiter('f1com')
         
         # Load configuration
-        with open(config_path, 'r') as f:
-            config = yaml.safe_load(f)
+        config = load_config(config_path)
         
         self.base_url = config['f1com']['base_url']
         self.api_base = config['f1com']['api_base']
         self.endpoints = config['f1com']['endpoints']
         self.user_agent = config['f1com']['user_agent']
         
-        self.session = requests.Session()
-        self.session.headers.update({'User-Agent': self.user_agent})
+        # Pooled session; also negotiates gzip so pages transfer compressed
+        self.session = create_session(user_agent=self.user_agent)
         
         self.logger.info(f"Initialized F1.com scraper (base URL: {self.base_url})")
     
@@ -49,7 +70,9 @@ class F1ComScraper:
         self,
         url: str,
         use_cache: bool = True,
-        use_api: bool = False
+        use_api: bool = False,
+        raw: bool = False,
+        params: Optional[Dict] = None
     ) -> Optional[Any]:
         """
         Make HTTP request.
@@ -58,46 +81,84 @@ class F1ComScraper:
             url: URL to request
             use_cache: Whether to use cache
             use_api: Whether this is an API request (returns JSON)
+            raw: Return the undecoded HTML instead of BeautifulSoup
+            params: Query parameters
             
         Returns:
-            Response data (BeautifulSoup for HTML, dict for JSON)
+            Response data (BeautifulSoup or raw HTML for HTML, dict for JSON)
         """
         # Check cache
         if use_cache:
-            cached_data = self.cache.get(url)
-            if cached_data is not None:
+            cached_data = self.cache.get(url, params)
+            # HTML entries cached before pages were stored as bytes are refetched
+            if cached_data is not None and (use_api or isinstance(cached_data, bytes)):
                 self.logger.debug(f"Cache hit for {url}")
-                if use_api:
+                if use_api or raw:
                     return cached_data
                 else:
-                    return BeautifulSoup(cached_data, 'html.parser')
+                    return BeautifulSoup(cached_data, HTML_PARSER)
         
         # Rate limiting
         self.rate_limiter._wait_if_needed('f1com')
         
         try:
             self.rate_limiter.record_call('f1com')
-            response = self.session.get(url, timeout=30)
+            response = self.session.get(url, params=params, timeout=DEFAULT_TIMEOUT)
             response.raise_for_status()
             
             if use_api:
-                data = response.json()
+                data = decode_json(response.content)
             else:
-                data = response.text
+                # Raw bytes: skips the str decode, lxml reads the charset itself
+                data = response.content
                 # Cache raw HTML
                 if use_cache:
-                    self.cache.set(url, data)
-                return BeautifulSoup(data, 'html.parser')
+                    self.cache.set(url, data, params)
+                if raw:
+                    return data
+                return BeautifulSoup(data, HTML_PARSER)
             
             # Cache API response
             if use_cache:
-                self.cache.set(url, data)
+                self.cache.set(url, data, params)
             
             return data
         
         except requests.exceptions.RequestException as e:
             self.logger.error(f"Request failed for {url}: {e}")
             return None
+        except ValueError as e:
+            self.logger.error(f"Invalid JSON from {url}: {e}")
+            return None
+    
+    def _extract_results_rows(self, html: Any) -> List[List[str]]:
+        """
+        Extract cell text for each row of the results table, header excluded.
+        
+        Uses selectolax's Lexbor parser when installed, otherwise lxml XPath.
+        
+        Args:
+            html: Raw page HTML (bytes or str)
+            
+        Returns:
+            List of rows, each a list of stripped cell strings
+        """
+        if LexborHTMLParser is not None:
+            table = LexborHTMLParser(html).css_first(RESULTS_TABLE_SELECTOR)
+            if table is None:
+                return []
+            return [
+                [td.text().strip() for td in row.css('td')]
+                for row in table.css('tr')[1:]
+            ]
+        
+        tables = lxml.html.fromstring(html).xpath(RESULTS_TABLE_XPATH)
+        if not tables:
+            return []
+        return [
+            [td.text_content().strip() for td in row.xpath('./td')]
+            for row in tables[0].xpath('.//tr')[1:]
+        ]
     
     def scrape_race_results(
         self,
@@ -124,8 +185,8 @@ class F1ComScraper:
             circuit=circuit
         )
         
-        soup = self._make_request(url)
-        if soup is None:
+        html = self._make_request(url, raw=True)
+        if not html:
             return {}
         
         results = {
@@ -135,21 +196,16 @@ class F1ComScraper:
             'results': []
         }
         
-        # Find results table
-        table = soup.find('table', class_=re.compile('results', re.I))
-        if table:
-            rows = table.find_all('tr')[1:]  # Skip header
-            for row in rows:
-                cols = row.find_all('td')
-                if len(cols) >= 5:
-                    result = {
-                        'position': cols[0].text.strip(),
-                        'driver': cols[1].text.strip() if len(cols) > 1 else None,
-                        'constructor': cols[2].text.strip() if len(cols) > 2 else None,
-                        'time': cols[3].text.strip() if len(cols) > 3 else None,
-                        'points': cols[4].text.strip() if len(cols) > 4 else None
-                    }
-                    results['results'].append(result)
+        for cols in self._extract_results_rows(html):
+            if len(cols) >= 5:
+                result = {
+                    'position': cols[0],
+                    'driver': cols[1],
+                    'constructor': cols[2],
+                    'time': cols[3],
+                    'points': cols[4]
+                }
+                results['results'].append(result)
         
         self.logger.info(f"Scraped {len(results['results'])} race results")
         return results
@@ -196,13 +252,13 @@ class F1ComScraper:
         }
         
         # Try to find sector times
-        sector_section = soup.find('div', class_=re.compile('sector', re.I))
+        sector_section = soup.select_one(SECTOR_SECTION_SELECTOR)
         if sector_section:
             # Parse sector times
             pass
         
         # Try to find stint data
-        stint_section = soup.find('div', class_=re.compile('stint', re.I))
+        stint_section = soup.select_one(STINT_SECTION_SELECTOR)
         if stint_section:
             # Parse stint data
             pass
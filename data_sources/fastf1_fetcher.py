@@ -4,38 +4,98 @@ Extracts session telemetry, sector times, tyre compounds, weather data, and micr
 Uses the FastF1 Python library for modern F1 data (2018+).
 """
 
-import fastf1
-import pandas as pd
-from typing import Dict, List, Optional, Any
+from __future__ import annotations
+
+import importlib
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, List, Optional, Any
 from pathlib import Path
-import yaml
 
 from utils.logger import get_logger
 from utils.rate_limiter import get_rate_limiter
+from utils.config_loader import load_config
+from utils.request_coalescer import RequestCoalescer
+
+# fastf1 (which pulls in pandas, numpy and more) takes seconds to import, so
+# it is loaded when the first fetcher is created rather than at import time
+if TYPE_CHECKING:
+    import fastf1
+    import numpy as np
+    import pandas as pd
+else:
+    fastf1 = None
+    np = None
+    pd = None
+
+_dependencies_lock = threading.Lock()
 
 logger = get_logger()
 
 
+def _import_dependencies():
+    """Import fastf1, numpy and pandas into module globals on first use."""
+    global fastf1, np, pd
+    # Fetchers are created from worker threads; one thread imports while
+    # the others wait, so nobody sees fastf1 set before np and pd
+    with _dependencies_lock:
+        if fastf1 is not None:
+            return
+        numpy_module = importlib.import_module('numpy')
+        pandas_module = importlib.import_module('pandas')
+        fastf1_module = importlib.import_module('fastf1')
+        np, pd, fastf1 = numpy_module, pandas_module, fastf1_module
+
+# Loaded sessions shared by all fetchers in the process, most recent last
+_session_cache: OrderedDict = OrderedDict()
+_session_cache_lock = threading.Lock()
+# Sessions are shared through _session_cache anyway, so no copy per caller
+_session_loads = RequestCoalescer(copy_results=False)
+
+# Driver -> index label of the fastest lap per session, dropped along with
+# the session. Only labels are stored: a Lap keeps a strong reference to its
+# session, which would keep the weak key alive forever
+_fastest_laps_cache: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+_fastest_laps_lock = threading.Lock()
+
+
 class FastF1Fetcher:
     """Fetches data using FastF1 library."""
     
-    def __init__(self, config_path: str = "config/data_sources.yaml"):
+    # Loaded sessions kept in memory (each holds full timing and telemetry)
+    SESSION_CACHE_SIZE = 8
+    
+    # Low-cardinality string columns stored as categoricals when downcasting
+    CATEGORICAL_COLUMNS = ('Compound', 'Driver', 'Team', 'TrackStatus', 'Source')
+    
+    def __init__(
+        self,
+        config_path: str = "config/data_sources.yaml",
+        dtype_downcast: bool = True
+    ):
         """
         Initialize FastF1 fetcher.
         
         Args:
             config_path: Path to data sources configuration
+            dtype_downcast: Return frames with compact dtypes (float32, small ints, categoricals)
         """
+        _import_dependencies()
+        
         self.logger = logger
+        self.dtype_downcast = dtype_downcast
         self.rate_limiter = get_rate_limiter().get_limiter('fastf1')
         
         # Load configuration
-        with open(config_path, 'r') as f:
-            config = yaml.safe_load(f)
+        config = load_config(config_path)
         
         fastf1_config = config.get('fastf1', {})
         self.cache_dir = fastf1_config.get('cache_dir', 'cache/fastf1')
         self.data_dir = fastf1_config.get('data_dir', 'cache/fastf1_data')
+        self.max_workers = fastf1_config.get('max_workers') or min(20, (os.cpu_count() or 1) * 5)
         
         # Configure FastF1 cache
         Path(self.cache_dir).mkdir(parents=True, exist_ok=True)
@@ -43,7 +103,7 @@ class FastF1Fetcher:
         
         fastf1.Cache.enable_cache(self.cache_dir)
         
-        self.logger.info(f"Initialized FastF1 fetcher (cache: {self.cache_dir})")
+        self.logger.info("Initialized FastF1 fetcher (cache: %s)", self.cache_dir)
     
     def get_session(
         self,
@@ -54,6 +114,9 @@ class FastF1Fetcher:
         """
         Get FastF1 session object.
         
+        Recently loaded sessions are kept in a process-wide LRU cache and
+        shared between callers.
+        
         Args:
             year: Season year
             circuit: Circuit name (e.g., 'Monza', 'Silverstone')
@@ -62,15 +125,86 @@ class FastF1Fetcher:
         Returns:
             FastF1 session object or None
         """
+        key = (year, circuit, session_type)
+        with _session_cache_lock:
+            if key in _session_cache:
+                _session_cache.move_to_end(key)
+                return _session_cache[key]
+        
         try:
-            self.logger.info(f"Loading session: {year} {circuit} {session_type}")
-            session = fastf1.get_session(year, circuit, session_type)
-            session.load()
-            return session
+            # Concurrent requests for the same session share one load
+            return _session_loads.run(key, lambda: self._load_session(*key))
         except Exception as e:
-            self.logger.error(f"Failed to load session {year} {circuit} {session_type}: {e}")
+            self.logger.error("Failed to load session %s %s %s: %s", year, circuit, session_type, e)
             return None
     
+    def _load_session(
+        self,
+        year: int,
+        circuit: str,
+        session_type: str
+    ) -> fastf1.core.Session:
+        """
+        Load a session from FastF1 and add it to the in-memory session cache.
+        
+        Args:
+            year: Season year
+            circuit: Circuit name
+            session_type: Session type
+            
+        Returns:
+            Loaded FastF1 session object
+        """
+        self.logger.info("Loading session: %s %s %s", year, circuit, session_type)
+        session = fastf1.get_session(year, circuit, session_type)
+        session.load()
+        
+        with _session_cache_lock:
+            _session_cache[(year, circuit, session_type)] = session
+            while len(_session_cache) > self.SESSION_CACHE_SIZE:
+                _session_cache.popitem(last=False)
+        
+        return session
+    
+    @staticmethod
+    def clear_session_cache():
+        """Drop all loaded sessions so the next request reloads them."""
+        with _session_cache_lock:
+            _session_cache.clear()
+    
+    def _downcast(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Shrink numeric columns to the smallest dtype that holds them.
+        
+        Floats become float32, integers the smallest fitting int type and
+        known low-cardinality string columns categoricals. Returns a new
+        frame; the input (often owned by a cached session) is not modified.
+        
+        Args:
+            df: DataFrame to downcast
+            
+        Returns:
+            Downcast DataFrame (the input itself if disabled or nothing to change)
+        """
+        if not self.dtype_downcast or df is None or len(df) == 0:
+            return df
+        
+        converted = {}
+        for column in df.columns:
+            series = df[column]
+            if pd.api.types.is_bool_dtype(series):
+                continue
+            if pd.api.types.is_float_dtype(series):
+                converted[column] = pd.to_numeric(series, downcast='float')
+            elif pd.api.types.is_integer_dtype(series):
+                converted[column] = pd.to_numeric(series, downcast='integer')
+            elif column in self.CATEGORICAL_COLUMNS and series.dtype == object:
+                converted[column] = series.astype('category')
+        
+        if not converted:
+            return df
+        return df.assign(**converted)
+    
     def fetch_laps(
         self,
         session: fastf1.core.Session
@@ -86,21 +220,23 @@ class FastF1Fetcher:
         """
         try:
             laps = session.laps
-            self.logger.info(f"Fetched {len(laps)} lap records")
-            return laps
+            self.logger.info("Fetched %s lap records", len(laps))
+            return self._downcast(laps)
         except Exception as e:
-            self.logger.error(f"Failed to fetch laps: {e}")
+            self.logger.error("Failed to fetch laps: %s", e)
             return pd.DataFrame()
     
     def fetch_sector_times(
         self,
-        session: fastf1.core.Session
+        session: fastf1.core.Session,
+        copy: bool = False
     ) -> pd.DataFrame:
         """
         Fetch sector times.
         
         Args:
             session: FastF1 session object
+            copy: Return an explicit copy (avoids SettingWithCopyWarning if the result is modified)
             
         Returns:
             DataFrame with sector times
@@ -108,25 +244,30 @@ class FastF1Fetcher:
         try:
             laps = session.laps
             if 'Sector1Time' in laps.columns:
-                sector_times = laps[['DriverNumber', 'LapNumber', 'Sector1Time', 'Sector2Time', 'Sector3Time']].copy()
-                self.logger.info(f"Fetched sector times for {len(sector_times)} laps")
-                return sector_times
+                # Column selection already builds a new frame; a further copy is opt-in
+                sector_times = laps.loc[:, ['DriverNumber', 'LapNumber', 'Sector1Time', 'Sector2Time', 'Sector3Time']]
+                if copy:
+                    sector_times = sector_times.copy()
+                self.logger.info("Fetched sector times for %s laps", len(sector_times))
+                return self._downcast(sector_times)
             else:
                 self.logger.warning("Sector times not available for this session")
                 return pd.DataFrame()
         except Exception as e:
-            self.logger.error(f"Failed to fetch sector times: {e}")
+            self.logger.error("Failed to fetch sector times: %s", e)
             return pd.DataFrame()
     
     def fetch_tyre_compounds(
         self,
-        session: fastf1.core.Session
+        session: fastf1.core.Session,
+        copy: bool = False
     ) -> pd.DataFrame:
         """
         Fetch tyre compound information.
         
         Args:
             session: FastF1 session object
+            copy: Return an explicit copy (avoids SettingWithCopyWarning if the result is modified)
             
         Returns:
             DataFrame with tyre compound data
@@ -134,14 +275,17 @@ class FastF1Fetcher:
         try:
             laps = session.laps
             if 'Compound' in laps.columns:
-                tyre_data = laps[['DriverNumber', 'LapNumber', 'Compound', 'TyreLife', 'Stint']].copy()
-                self.logger.info(f"Fetched tyre data for {len(tyre_data)} laps")
-                return tyre_data
+                # Column selection already builds a new frame; a further copy is opt-in
+                tyre_data = laps.loc[:, ['DriverNumber', 'LapNumber', 'Compound', 'TyreLife', 'Stint']]
+                if copy:
+                    tyre_data = tyre_data.copy()
+                self.logger.info("Fetched tyre data for %s laps", len(tyre_data))
+                return self._downcast(tyre_data)
             else:
                 self.logger.warning("Tyre compound data not available for this session")
                 return pd.DataFrame()
         except Exception as e:
-            self.logger.error(f"Failed to fetch tyre compounds: {e}")
+            self.logger.error("Failed to fetch tyre compounds: %s", e)
             return pd.DataFrame()
     
     def fetch_weather(
@@ -160,15 +304,97 @@ class FastF1Fetcher:
         try:
             weather = session.weather_data
             if weather is not None and len(weather) > 0:
-                self.logger.info(f"Fetched {len(weather)} weather records")
-                return weather
+                self.logger.info("Fetched %s weather records", len(weather))
+                return self._downcast(weather)
             else:
                 self.logger.warning("Weather data not available for this session")
                 return pd.DataFrame()
         except Exception as e:
-            self.logger.error(f"Failed to fetch weather: {e}")
+            self.logger.error("Failed to fetch weather: %s", e)
             return pd.DataFrame()
     
+    def _get_fastest_laps(
+        self,
+        session: fastf1.core.Session
+    ) -> Dict[str, fastf1.core.Lap]:
+        """
+        Get each driver's fastest lap, searching the laps once per session.
+        
+        Uses a single groupby over the session's laps instead of a
+        pick_driver/pick_fastest pass per driver. Like pick_fastest(),
+        only personal-best laps with a lap time are considered.
+        
+        Args:
+            session: FastF1 session object
+            
+        Returns:
+            Dictionary mapping driver abbreviation to fastest Lap, in session driver order
+        """
+        laps = session.laps
+        
+        with _fastest_laps_lock:
+            fastest_labels = _fastest_laps_cache.get(session)
+        if fastest_labels is None:
+            fastest_labels = self._fastest_lap_labels(laps)
+            with _fastest_laps_lock:
+                _fastest_laps_cache[session] = fastest_labels
+        
+        return {driver_abbr: laps.loc[label] for driver_abbr, label in fastest_labels.items()}
+    
+    @staticmethod
+    def _fastest_lap_labels(laps: fastf1.core.Laps) -> Dict[str, Any]:
+        """
+        Find the index label of each driver's fastest lap.
+        
+        Args:
+            laps: Session laps
+            
+        Returns:
+            Dictionary mapping driver abbreviation to lap index label, in session driver order
+        """
+        candidates = laps.loc[laps['LapTime'].notna()]
+        if 'IsPersonalBest' in candidates.columns:
+            candidates = candidates.loc[candidates['IsPersonalBest'] == True]  # noqa: E712 (nullable column)
+        fastest_idx = candidates.groupby('Driver')['LapTime'].idxmin()
+        
+        return {
+            driver_abbr: fastest_idx[driver_abbr]
+            for driver_abbr in laps['Driver'].unique()
+            if driver_abbr in fastest_idx.index
+        }
+    
+    def _fetch_fastest_lap_data(
+        self,
+        session: fastf1.core.Session,
+        getter: str,
+        label: str
+    ) -> List[pd.DataFrame]:
+        """
+        Fetch per-sample data for every driver's fastest lap, one driver per worker thread.
+        
+        Args:
+            session: FastF1 session object
+            getter: Lap method returning the data ('get_car_data' or 'get_pos_data')
+            label: Data description used in log messages
+            
+        Returns:
+            List of DataFrames tagged with a 'Driver' column, in driver order
+        """
+        fastest_laps = self._get_fastest_laps(session)
+        
+        def fetch_driver(driver_abbr: str) -> Optional[pd.DataFrame]:
+            try:
+                frame = getattr(fastest_laps[driver_abbr], getter)()
+                frame['Driver'] = driver_abbr
+                return frame
+            except Exception as e:
+                self.logger.warning("Failed to get %s for %s: %s", label, driver_abbr, e)
+            return None
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            frames = executor.map(fetch_driver, fastest_laps)
+            return [frame for frame in frames if frame is not None]
+    
     def fetch_telemetry(
         self,
         session: fastf1.core.Session,
@@ -194,34 +420,23 @@ class FastF1Fetcher:
                     specific_lap = driver_laps[driver_laps['LapNumber'] == lap]
                     if len(specific_lap) > 0:
                         telemetry = specific_lap.iloc[0].get_car_data()
-                        return telemetry
+                        return self._downcast(telemetry)
             elif driver:
                 # All laps for specific driver
-                driver_laps = session.laps.pick_driver(driver)
-                if len(driver_laps) > 0:
-                    fastest_lap = driver_laps.pick_fastest()
+                fastest_lap = self._get_fastest_laps(session).get(driver)
+                if fastest_lap is not None:
                     telemetry = fastest_lap.get_car_data()
-                    return telemetry
+                    return self._downcast(telemetry)
             else:
                 # All drivers, fastest lap each
-                telemetry_list = []
-                for driver_abbr in session.laps['Driver'].unique():
-                    try:
-                        driver_laps = session.laps.pick_driver(driver_abbr)
-                        if len(driver_laps) > 0:
-                            fastest_lap = driver_laps.pick_fastest()
-                            tel = fastest_lap.get_car_data()
-                            tel['Driver'] = driver_abbr
-                            telemetry_list.append(tel)
-                    except Exception as e:
-                        self.logger.warning(f"Failed to get telemetry for {driver_abbr}: {e}")
+                telemetry_list = self._fetch_fastest_lap_data(session, 'get_car_data', 'telemetry')
                 
                 if telemetry_list:
-                    return pd.concat(telemetry_list, ignore_index=True)
+                    return self._downcast(pd.concat(telemetry_list, ignore_index=True))
             
             return pd.DataFrame()
         except Exception as e:
-            self.logger.error(f"Failed to fetch telemetry: {e}")
+            self.logger.error("Failed to fetch telemetry: %s", e)
             return pd.DataFrame()
     
     def fetch_position_data(
@@ -241,31 +456,20 @@ class FastF1Fetcher:
         """
         try:
             if driver:
-                driver_laps = session.laps.pick_driver(driver)
-                if len(driver_laps) > 0:
-                    fastest_lap = driver_laps.pick_fastest()
+                fastest_lap = self._get_fastest_laps(session).get(driver)
+                if fastest_lap is not None:
                     position = fastest_lap.get_pos_data()
-                    return position
+                    return self._downcast(position)
             else:
                 # All drivers
-                position_list = []
-                for driver_abbr in session.laps['Driver'].unique():
-                    try:
-                        driver_laps = session.laps.pick_driver(driver_abbr)
-                        if len(driver_laps) > 0:
-                            fastest_lap = driver_laps.pick_fastest()
-                            pos = fastest_lap.get_pos_data()
-                            pos['Driver'] = driver_abbr
-                            position_list.append(pos)
-                    except Exception as e:
-                        self.logger.warning(f"Failed to get position for {driver_abbr}: {e}")
+                position_list = self._fetch_fastest_lap_data(session, 'get_pos_data', 'position')
                 
                 if position_list:
-                    return pd.concat(position_list, ignore_index=True)
+                    return self._downcast(pd.concat(position_list, ignore_index=True))
             
             return pd.DataFrame()
         except Exception as e:
-            self.logger.error(f"Failed to fetch position data: {e}")
+            self.logger.error("Failed to fetch position data: %s", e)
             return pd.DataFrame()
     
     def fetch_micro_sectors(
@@ -287,38 +491,67 @@ class FastF1Fetcher:
             laps = session.laps
             micro_sectors = []
             
-            for idx, lap in laps.iterrows():
+            for _, lap in laps.iterlaps():
                 try:
-                    tel = lap.get_car_data()
+                    # Car data carries no Distance column until it is integrated from speed
+                    tel = lap.get_car_data().add_distance()
                     if len(tel) > 0:
-                        # Calculate micro-sectors (e.g., 100m segments)
-                        # This is a simplified approach
-                        tel['MicroSector'] = pd.cut(
-                            tel['Distance'],
-                            bins=100,
-                            labels=False
-                        )
+                        tel = tel.loc[:, ['Time', 'Speed', 'Distance']]
                         tel['LapNumber'] = lap['LapNumber']
                         tel['DriverNumber'] = lap['DriverNumber']
-                        micro_sectors.append(tel[['LapNumber', 'DriverNumber', 'MicroSector', 'Time', 'Speed']])
+                        micro_sectors.append(tel)
                 except Exception as e:
                     continue
             
             if micro_sectors:
                 result = pd.concat(micro_sectors, ignore_index=True)
-                self.logger.info(f"Fetched micro-sector data for {len(result)} records")
-                return result
+                
+                # Split each lap's distance range into 100 equal segments in one
+                # vectorized pass (same bucketing pd.cut(bins=100) applied per lap).
+                # Laps are contiguous after the concat, so per-lap min/max come
+                # from reduceat over the lap boundaries instead of a groupby.
+                distance = result['Distance'].to_numpy(dtype=float)
+                lengths = np.fromiter((len(tel) for tel in micro_sectors), dtype=np.int64)
+                offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+                start = np.repeat(np.minimum.reduceat(distance, offsets), lengths)
+                span = np.repeat(np.maximum.reduceat(distance, offsets), lengths) - start
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    fraction = np.where(span > 0, (distance - start) / span, 0.0)
+                result['MicroSector'] = np.clip(np.floor(fraction * 100), 0, 99).astype(np.int16)
+                
+                result = result.loc[:, ['LapNumber', 'DriverNumber', 'MicroSector', 'Time', 'Speed']]
+                self.logger.info("Fetched micro-sector data for %s records", len(result))
+                return self._downcast(result)
             else:
                 return pd.DataFrame()
         except Exception as e:
-            self.logger.error(f"Failed to fetch micro-sectors: {e}")
+            self.logger.error("Failed to fetch micro-sectors: %s", e)
             return pd.DataFrame()
     
+    def _session_attr(self, session: fastf1.core.Session, attr: str) -> Any:
+        """
+        Read a session attribute, returning None if it is missing or not loaded.
+        
+        Args:
+            session: FastF1 session object
+            attr: Attribute name
+            
+        Returns:
+            Attribute value or None
+        """
+        try:
+            return getattr(session, attr, None)
+        except Exception as e:
+            # FastF1 raises its own errors for data that was not loaded
+            self.logger.warning("Could not fetch session %s: %s", attr, e)
+            return None
+    
     def fetch_session_data(
         self,
         year: int,
         circuit: str,
-        session_type: str
+        session_type: str,
+        concurrent: bool = True
     ) -> Dict[str, Any]:
         """
         Fetch complete session data.
@@ -327,11 +560,12 @@ class FastF1Fetcher:
             year: Season year
             circuit: Circuit name
             session_type: Session type
+            concurrent: Run the individual fetches in parallel (False = one after another)
             
         Returns:
             Dictionary with all session data
         """
-        self.logger.info(f"Fetching complete session data: {year} {circuit} {session_type}")
+        self.logger.info("Fetching complete session data: %s %s %s", year, circuit, session_type)
         
         session = self.get_session(year, circuit, session_type)
         if session is None:
@@ -340,28 +574,52 @@ class FastF1Fetcher:
         data = {
             'year': year,
             'circuit': circuit,
-            'session_type': session_type,
-            'laps': self.fetch_laps(session),
-            'sector_times': self.fetch_sector_times(session),
-            'tyre_compounds': self.fetch_tyre_compounds(session),
-            'weather': self.fetch_weather(session),
-            'telemetry': self.fetch_telemetry(session),
-            'position': self.fetch_position_data(session),
-            'micro_sectors': self.fetch_micro_sectors(session)
+            'session_type': session_type
         }
         
-        # Add session metadata
-        try:
-            data['session_info'] = {
-                'session_name': session.session_info.get('Name', ''),
-                'session_date': str(session.date),
-                'session_start': str(session.session_start_time) if hasattr(session, 'session_start_time') else None,
-                'session_end': str(session.session_end_time) if hasattr(session, 'session_end_time') else None
+        tasks = {
+            'laps': self.fetch_laps,
+            'sector_times': self.fetch_sector_times,
+            'tyre_compounds': self.fetch_tyre_compounds,
+            'weather': self.fetch_weather,
+            'telemetry': self.fetch_telemetry,
+            'position': self.fetch_position_data,
+            'micro_sectors': self.fetch_micro_sectors
+        }
+        
+        # The loaded session is only read from here on, so the fetches are independent
+        if concurrent:
+            # Telemetry and position already fan out over drivers on a pool of
+            # their own; they run after this pool rather than inside it, so at
+            # most max_workers threads are busy at once
+            per_driver = ('telemetry', 'position')
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {
+                    key: executor.submit(fetch, session)
+                    for key, fetch in tasks.items()
+                    if key not in per_driver
+                }
+                results = {key: future.result() for key, future in futures.items()}
+            results.update({key: tasks[key](session) for key in per_driver})
+            data.update({key: results[key] for key in tasks})
+        else:
+            data.update({key: fetch(session) for key, fetch in tasks.items()})
+        
+        # Add session metadata; each field is read on its own so one
+        # unavailable attribute does not discard the others
+        session_info = self._session_attr(session, 'session_info') or {}
+        data['session_info'] = {
+            'session_name': session_info.get('Name', ''),
+            **{
+                key: None if value is None else str(value)
+                for key, value in (
+                    ('session_date', self._session_attr(session, 'date')),
+                    ('session_start', self._session_attr(session, 'session_start_time')),
+                    ('session_end', self._session_attr(session, 'session_end_time'))
+                )
             }
-        except Exception as e:
-            self.logger.warning(f"Could not fetch session info: {e}")
-            data['session_info'] = {}
+        }
         
-        self.logger.info(f"Completed fetching session data: {year} {circuit} {session_type}")
+        self.logger.info("Completed fetching session data: %s %s %s", year, circuit, session_type)
         return data
 
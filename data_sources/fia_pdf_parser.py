@@ -3,19 +3,128 @@ FIA PDF parser.
 Downloads and parses FIA race classification PDFs for detailed results and timing data.
 """
 
+import os
 import requests
-import pdfplumber
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional, Any
-import yaml
+from typing import Dict, List, Optional, Any, Iterable, Iterator, Tuple
 import re
 
 from utils.logger import get_logger
 from utils.cache_manager import get_cache_manager
 from utils.rate_limiter import get_rate_limiter
+from utils.config_loader import load_config
+from utils.http_session import create_session
 
 logger = get_logger()
 
+# Leading columns of an FIA classification table
+RESULT_COLUMNS = ['position', 'driver', 'constructor', 'time']
+
+# Parsed PDFs are keyed on file identity, so they never go stale; keep them a year
+PARSED_PDF_TTL = 365 * 86400
+
+# Read size when streaming PDFs to disk
+DOWNLOAD_CHUNK_SIZE = 128 * 1024
+
+# Header row of a classification table ("Pos", "POS", ...)
+_POS_HEADER_RE = re.compile(r'\bpos\b', re.IGNORECASE)
+
+
+def _empty_parse_result(filename: str) -> Dict[str, Any]:
+    """Parsed-data skeleton for a PDF with no extracted content."""
+    import pandas as pd
+    
+    return {
+        'filename': filename,
+        'results': [],
+        'results_df': pd.DataFrame(columns=RESULT_COLUMNS),
+        'timing': []
+    }
+
+
+def _iter_pdf_pages(
+    filepath: str,
+    backend: str
+) -> Iterator[Tuple[str, List[List[List[Optional[str]]]]]]:
+    """
+    Yield the text and extracted tables of each page.
+    
+    Uses PyMuPDF when backend is 'pymupdf' (much faster, AGPL licensed,
+    optional), otherwise pdfplumber.
+    
+    Args:
+        filepath: Path to PDF file
+        backend: PDF backend ('pdfplumber' or 'pymupdf')
+        
+    Yields:
+        Tuple of (page text, list of tables as lists of rows)
+    """
+    if backend == 'pymupdf':
+        import pymupdf
+        
+        with pymupdf.open(filepath) as doc:
+            for page in doc:
+                tables = [found.extract() for found in page.find_tables().tables]
+                yield page.get_text("text"), tables
+    else:
+        import pdfplumber
+        
+        with pdfplumber.open(filepath) as pdf:
+            for page in pdf.pages:
+                # Pages without tables skip cell extraction entirely
+                tables = [found.extract() for found in page.find_tables()]
+                yield page.extract_text() or "", tables
+
+
+def _parse_pdf_worker(filepath: str, backend: str = 'pdfplumber') -> Dict[str, Any]:
+    """
+    Parse a classification PDF.
+    
+    Module-level (and free of parser state) so it can run in worker
+    processes.
+    
+    Args:
+        filepath: Path to PDF file
+        backend: PDF backend ('pdfplumber' or 'pymupdf')
+        
+    Returns:
+        Dictionary with parsed data
+    """
+    import pandas as pd
+    
+    data = _empty_parse_result(Path(filepath).name)
+    rows = []
+    
+    # Extract text and tables from each page in a single pass
+    text_parts = []
+    for page_text, tables in _iter_pdf_pages(filepath, backend):
+        text_parts.append(page_text)
+        
+        for table in tables:
+            # Parse classification table
+            if len(table) > 0 and _POS_HEADER_RE.search(
+                ' '.join(cell for cell in (table[0] or []) if cell)
+            ):
+                # This is likely a classification table
+                rows.extend(row[:4] for row in table[1:] if len(row) >= 4)
+    
+    data['full_text'] = "".join(part + "\n" for part in text_parts)
+    
+    if rows:
+        # Build the frame once for all pages and clean cells column-wise
+        results_df = pd.DataFrame.from_records(rows, columns=RESULT_COLUMNS)
+        for column in RESULT_COLUMNS:
+            results_df[column] = results_df[column].astype('string').str.strip()
+        # Blank cells become None, as before
+        results_df = results_df.astype(object).where(
+            results_df.notna() & (results_df != ''), None
+        )
+        data['results_df'] = results_df
+        data['results'] = results_df.to_dict('records')
+    
+    return data
+
 
 class FIAPDFParser:
     """Downloads and parses FIA PDF documents."""
@@ -32,19 +141,23 @@ class FIAPDFParser:
         self.rate_limiter = get_rate_limiter().get_limiter('fia')
         
         # Load configuration
-        with open(config_path, 'r') as f:
-            config = yaml.safe_load(f)
+        config = load_config(config_path)
         
         self.base_url = config['fia']['base_url']
         self.endpoints = config['fia']['endpoints']
         self.user_agent = config['fia']['user_agent']
         self.pdf_dir = Path(config['fia']['pdf_dir'])
         self.pdf_dir.mkdir(parents=True, exist_ok=True)
+        self.pdf_backend = config['fia'].get('pdf_backend', 'pdfplumber')
         
-        self.session = requests.Session()
-        self.session.headers.update({'User-Agent': self.user_agent})
+        # Pooled keep-alive session, safe to share across download threads
+        self.session = create_session(
+            user_agent=self.user_agent,
+            pool_connections=16,
+            status_forcelist=(429, 500, 502, 503, 504)
+        )
         
-        self.logger.info(f"Initialized FIA PDF parser (PDF dir: {self.pdf_dir})")
+        self.logger.info("Initialized FIA PDF parser (PDF dir: %s)", self.pdf_dir)
     
     def _download_pdf(
         self,
@@ -65,28 +178,118 @@ class FIAPDFParser:
         
         # Check if already downloaded
         if filepath.exists():
-            self.logger.debug(f"PDF already exists: {filename}")
+            self.logger.debug("PDF already exists: %s", filename)
             return filepath
         
         # Rate limiting
-        self.rate_limiter._wait_if_needed('fia')
+        self.rate_limiter.acquire('fia')
+        
+        # Write to a side file and rename when complete, so an interrupted
+        # download never leaves a truncated PDF behind at filepath
+        part_path = filepath.with_suffix(filepath.suffix + '.part')
         
         try:
-            self.rate_limiter.record_call('fia')
             response = self.session.get(url, timeout=60, stream=True)
             response.raise_for_status()
             
-            with open(filepath, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
+            # Copy in 128 KiB blocks. iter_content decodes any gzip transfer
+            # encoding and turns urllib3 errors on a dropped connection
+            # into RequestException, unlike reading response.raw directly
+            with open(part_path, 'wb') as f:
+                for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
                     f.write(chunk)
             
-            self.logger.info(f"Downloaded PDF: {filename}")
-            return filepath
+            return self._finish_download(url, part_path, filepath, response.headers)
         
-        except requests.exceptions.RequestException as e:
-            self.logger.error(f"Failed to download PDF {url}: {e}")
+        except (requests.exceptions.RequestException, OSError) as e:
+            self.logger.error("Failed to download PDF %s: %s", url, e)
+            if part_path.exists():
+                part_path.unlink()
             return None
     
+    def _finish_download(
+        self,
+        url: str,
+        part_path: Path,
+        filepath: Path,
+        headers: Any
+    ) -> Optional[Path]:
+        """
+        Verify a completed .part download and move it into place.
+        
+        Args:
+            url: PDF URL
+            part_path: Path the body was written to
+            filepath: Final PDF path
+            headers: Response headers
+            
+        Returns:
+            Path to downloaded file or None if the body was incomplete
+        """
+        # Content-Length is the encoded size, so it is only comparable when
+        # the body was sent unencoded
+        expected_size = headers.get('Content-Length')
+        encoding = headers.get('Content-Encoding', 'identity')
+        if expected_size and encoding == 'identity':
+            actual_size = part_path.stat().st_size
+            if actual_size != int(expected_size):
+                self.logger.error(
+                    "Incomplete download of PDF %s: %s of %s bytes", url, actual_size, expected_size
+                )
+                part_path.unlink()
+                return None
+        
+        os.replace(part_path, filepath)
+        self.logger.info("Downloaded PDF: %s", filepath.name)
+        return filepath
+    
+    def _parse_cache_key(self, filepath: Path) -> Tuple[str, Dict[str, Any]]:
+        """
+        Build the cache URL and parameters identifying a parsed PDF.
+        
+        Args:
+            filepath: Path to PDF file
+            
+        Returns:
+            Tuple of (cache URL, cache parameters)
+        """
+        stat = filepath.stat()
+        cache_params = {
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'backend': self.pdf_backend
+        }
+        return f"fia-pdf://{filepath.name}", cache_params
+    
+    def _get_cached_parse(self, filepath: Path) -> Optional[Dict[str, Any]]:
+        """
+        Get the cached parse of a PDF, if any.
+        
+        Args:
+            filepath: Path to PDF file
+            
+        Returns:
+            Parsed data or None if not cached
+        """
+        cached_data = self.cache.get(*self._parse_cache_key(filepath))
+        if cached_data is None:
+            return None
+        
+        self.logger.debug("Using cached parse of %s", filepath.name)
+        # Callers add keys to the result; keep the cached dict intact
+        return dict(cached_data)
+    
+    def _cache_parse(self, filepath: Path, data: Dict[str, Any]):
+        """
+        Cache the parse of a PDF.
+        
+        Args:
+            filepath: Path to PDF file
+            data: Parsed data
+        """
+        cache_url, cache_params = self._parse_cache_key(filepath)
+        self.cache.set(cache_url, dict(data), cache_params, ttl=PARSED_PDF_TTL)
+    
     def _parse_pdf(
         self,
         filepath: Path
@@ -94,51 +297,76 @@ class FIAPDFParser:
         """
         Parse PDF file.
         
+        Parsed output is cached keyed on the file's name, modification
+        time and size, so an unchanged PDF is only parsed once.
+        
         Args:
             filepath: Path to PDF file
             
         Returns:
             Dictionary with parsed data
         """
-        self.logger.info(f"Parsing PDF: {filepath.name}")
+        cached_data = self._get_cached_parse(filepath)
+        if cached_data is not None:
+            return cached_data
         
-        data = {
-            'filename': filepath.name,
-            'results': [],
-            'timing': []
-        }
+        self.logger.info("Parsing PDF: %s", filepath.name)
         
         try:
-            with pdfplumber.open(filepath) as pdf:
-                # Extract text from all pages
-                full_text = ""
-                for page in pdf.pages:
-                    full_text += page.extract_text() + "\n"
-                
-                # Try to extract tables
-                for page in pdf.pages:
-                    tables = page.extract_tables()
-                    for table in tables:
-                        # Parse classification table
-                        if len(table) > 0 and 'Pos' in str(table[0]).lower():
-                            # This is likely a classification table
-                            for row in table[1:]:
-                                if len(row) >= 4:
-                                    result = {
-                                        'position': row[0].strip() if row[0] else None,
-                                        'driver': row[1].strip() if len(row) > 1 and row[1] else None,
-                                        'constructor': row[2].strip() if len(row) > 2 and row[2] else None,
-                                        'time': row[3].strip() if len(row) > 3 and row[3] else None
-                                    }
-                                    data['results'].append(result)
-                
-                data['full_text'] = full_text
-        
+            data = _parse_pdf_worker(str(filepath), self.pdf_backend)
         except Exception as e:
-            self.logger.error(f"Failed to parse PDF {filepath}: {e}")
+            self.logger.error("Failed to parse PDF %s: %s", filepath, e)
+            return _empty_parse_result(filepath.name)
         
+        self._cache_parse(filepath, data)
         return data
     
+    def parse_many(
+        self,
+        filepaths: List[Path],
+        max_workers: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Parse several PDFs in parallel worker processes.
+        
+        Parsing is CPU-bound pure Python, so separate processes are used
+        to get past the GIL. Already-cached PDFs are not sent to workers.
+        
+        Args:
+            filepaths: Paths to PDF files
+            max_workers: Number of worker processes (None = CPU count)
+            
+        Returns:
+            List of parsed data dictionaries, in input order
+        """
+        results: List[Optional[Dict[str, Any]]] = [
+            self._get_cached_parse(Path(filepath)) for filepath in filepaths
+        ]
+        pending = [i for i, data in enumerate(results) if data is None]
+        if not pending:
+            return results
+        
+        # One task per file: a PDF parse dwarfs the per-task IPC overhead
+        max_workers = max_workers or os.cpu_count() or 1
+        self.logger.info("Parsing %s PDFs with %s worker processes...", len(pending), max_workers)
+        
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                i: executor.submit(_parse_pdf_worker, str(filepaths[i]), self.pdf_backend)
+                for i in pending
+            }
+            for i, future in futures.items():
+                filepath = Path(filepaths[i])
+                try:
+                    results[i] = future.result()
+                except Exception as e:
+                    self.logger.error("Failed to parse PDF %s: %s", filepath, e)
+                    results[i] = _empty_parse_result(filepath.name)
+                    continue
+                self._cache_parse(filepath, results[i])
+        
+        return results
+    
     def find_race_classification_pdf(
         self,
         year: int,
@@ -163,7 +391,7 @@ class FIAPDFParser:
         # 2. Find the race classification document
         # 3. Extract the PDF URL
         
-        self.logger.warning(f"PDF URL lookup not fully implemented for {year} round {round_num}")
+        self.logger.warning("PDF URL lookup not fully implemented for %s round %s", year, round_num)
         return None
     
     def download_and_parse(
@@ -181,7 +409,7 @@ class FIAPDFParser:
         Returns:
             Dictionary with parsed data
         """
-        self.logger.info(f"Downloading and parsing FIA PDF for {year} round {round_num}...")
+        self.logger.info("Downloading and parsing FIA PDF for %s round %s...", year, round_num)
         
         # Find PDF URL
         pdf_url = self.find_race_classification_pdf(year, round_num)
@@ -201,4 +429,24 @@ class FIAPDFParser:
         data['round'] = round_num
         
         return data
-
+    
+    def download_and_parse_many(
+        self,
+        races: Iterable[Tuple[int, int]],
+        max_workers: int = 8
+    ) -> List[Dict[str, Any]]:
+        """
+        Download and parse race classification PDFs for several races concurrently.
+        
+        Downloads share the pooled session and the FIA rate limiter, so
+        the overall request rate stays within limits.
+        
+        Args:
+            races: (year, round) pairs
+            max_workers: Maximum number of races processed at once
+            
+        Returns:
+            List of parsed data dictionaries, in input order
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(lambda race: self.download_and_parse(*race), races))
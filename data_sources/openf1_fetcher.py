@@ -4,15 +4,23 @@ Fetches telemetry data from OpenF1 API (2018+).
 Includes speed, throttle, brake, gear, RPM, DRS, GPS position, track status.
 """
 
+import io
 import requests
 import time
-from typing import Dict, List, Optional, Any
+import urllib3
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, List, Optional, Any, Union
 from datetime import datetime
-import yaml
 
 from utils.logger import get_logger
 from utils.cache_manager import get_cache_manager
 from utils.rate_limiter import get_rate_limiter
+from utils.config_loader import load_config
+from utils.request_coalescer import RequestCoalescer
+from utils.http_session import create_session, decode_json, DEFAULT_TIMEOUT
+
+if TYPE_CHECKING:
+    import pyarrow as pa
 
 logger = get_logger()
 
@@ -20,6 +28,16 @@ logger = get_logger()
 class OpenF1Fetcher:
     """Fetches telemetry data from OpenF1 API."""
     
+    # How long a 404/422 (no data) is remembered; short because data for a
+    # session can still appear after it has run
+    MISS_TTL = 3600
+    
+    # From this many requested drivers (about half the grid) one unfiltered
+    # request per endpoint, filtered in memory, is cheaper than per-driver
+    # requests; below it the extra data (car_data especially) outweighs the
+    # saved requests
+    SESSION_WIDE_MIN_DRIVERS = 10
+    
     def __init__(self, config_path: str = "config/data_sources.yaml"):
         """
         Initialize OpenF1 fetcher.
@@ -32,21 +50,52 @@ class OpenF1Fetcher:
         self.rate_limiter = get_rate_limiter().get_limiter('openf1')
         
         # Load configuration
-        with open(config_path, 'r') as f:
-            config = yaml.safe_load(f)
+        config = load_config(config_path)
         
         self.base_url = config['openf1']['base_url']
         self.endpoints = config['openf1']['endpoints']
         self.rate_limit = config['openf1']['rate_limit']
+        self.max_workers = config['openf1'].get('max_workers', 8)
+        
+        # Cache TTL keyed by endpoint path, as passed to _make_request
+        self.cache_ttls = {
+            self.endpoints[name]: ttl
+            for name, ttl in (config['openf1'].get('cache_ttl') or {}).items()
+        }
+        
+        # One keep-alive pool for every endpoint; telemetry fetches issue
+        # many calls to the same host
+        self.session = create_session(
+            pool_connections=16,
+            pool_maxsize=32,
+            max_retries=5,
+            backoff_factor=0.5,
+            # 429 is retried after the server's Retry-After delay
+            status_forcelist=(429, 500, 502, 503, 504)
+        )
+        
+        # Concurrent callers asking for the same uncached resource share one request
+        self._inflight = RequestCoalescer()
         
         self.logger.info(f"Initialized OpenF1 fetcher (base URL: {self.base_url})")
     
+    def close(self):
+        """Close the HTTP session and its pooled connections."""
+        self.session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
     def _make_request(
         self,
         endpoint: str,
         params: Optional[Dict] = None,
-        use_cache: bool = True
-    ) -> Optional[List[Dict]]:
+        use_cache: bool = True,
+        as_arrow: bool = False
+    ) -> Union[List[Dict], 'pa.Table', None]:
         """
         Make API request with caching and rate limiting.
         
@@ -54,39 +103,78 @@ class OpenF1Fetcher:
             endpoint: API endpoint
             params: Request parameters
             use_cache: Whether to use cache
+            as_arrow: Request CSV and stream it into a pyarrow Table, so the
+                body is never held in memory as bytes plus Python objects
             
         Returns:
-            API response as list of dictionaries
+            API response as list of dictionaries (or a pyarrow Table)
         """
         url = f"{self.base_url}{endpoint}"
+        if as_arrow:
+            params = dict(params or {}, csv='true')
         
         # Check cache
         if use_cache:
             cached_data = self.cache.get(url, params)
             if cached_data is not None:
                 self.logger.debug(f"Cache hit for {url}")
+                if self.cache.is_miss(cached_data):
+                    return None
                 return cached_data
         
-        # Rate limiting
-        self.rate_limiter._wait_if_needed('openf1')
+        request_key = (url, tuple(sorted((params or {}).items())))
+        return self._inflight.run(
+            request_key,
+            lambda: self._fetch_url(endpoint, params, use_cache, as_arrow)
+        )
+    
+    def _fetch_url(
+        self,
+        endpoint: str,
+        params: Optional[Dict],
+        use_cache: bool,
+        as_arrow: bool
+    ) -> Union[List[Dict], 'pa.Table', None]:
+        """
+        Perform the rate-limited HTTP request for a cache miss.
+        
+        Args:
+            endpoint: API endpoint
+            params: Request parameters
+            use_cache: Whether to cache the response
+            as_arrow: Stream a CSV response into a pyarrow Table
+            
+        Returns:
+            API response as list of dictionaries (or a pyarrow Table)
+        """
+        url = f"{self.base_url}{endpoint}"
+        
+        # Rate limiting (acquire is safe to call from worker threads)
+        self.rate_limiter.acquire('openf1')
         
         try:
-            self.rate_limiter.record_call('openf1')
-            response = requests.get(url, params=params, timeout=60)
-            response.raise_for_status()
-            
-            data = response.json()
+            if as_arrow:
+                data = self._read_csv_stream(url, params)
+            else:
+                response = self.session.get(url, params=params, timeout=DEFAULT_TIMEOUT)
+                self.rate_limiter.update_from_headers('openf1', response.headers)
+                response.raise_for_status()
+                data = decode_json(response.content)
             
             # Cache response
             if use_cache:
-                self.cache.set(url, data, params)
+                self.cache.set(url, data, params, ttl=self.cache_ttls.get(endpoint))
             
             return data
         
         except requests.exceptions.HTTPError as e:
+            if use_cache and e.response.status_code in (404, 422):
+                self.cache.set_miss(url, params, ttl=self.MISS_TTL)
             if e.response.status_code == 422:
                 # 422 Unprocessable Entity - data might not be available for this session
                 self.logger.warning(f"Data not available for {url} (422) - this is normal for some sessions")
+            elif e.response.status_code == 429:
+                self.logger.warning(f"Rate limited by OpenF1 for {url} (429)")
             elif e.response.status_code == 404:
                 self.logger.warning(f"Endpoint not found: {url} (404)")
             else:
@@ -98,6 +186,56 @@ class OpenF1Fetcher:
         except requests.exceptions.RequestException as e:
             self.logger.error(f"Request failed for {url}: {e}")
             return None
+        except urllib3.exceptions.HTTPError as e:
+            # Raised unwrapped while pyarrow reads the raw CSV stream, e.g.
+            # when the connection drops mid-body
+            self.logger.error(f"Connection error while reading {url}: {e}")
+            return None
+        except ValueError as e:
+            self.logger.error(f"Invalid response body from {url}: {e}")
+            return None
+    
+    def _read_csv_stream(self, url: str, params: Dict) -> 'pa.Table':
+        """
+        Stream a CSV response straight into a pyarrow Table.
+        
+        Args:
+            url: Request URL
+            params: Request parameters (including csv=true)
+            
+        Returns:
+            pyarrow Table (empty when the response has no rows)
+        """
+        import pyarrow as pa
+        import pyarrow.csv as pacsv
+        
+        with self.session.get(url, params=params, timeout=DEFAULT_TIMEOUT, stream=True) as response:
+            self.rate_limiter.update_from_headers('openf1', response.headers)
+            response.raise_for_status()
+            response.raw.decode_content = True
+            body = io.BufferedReader(response.raw)
+            # No matching samples yields an empty body, which read_csv rejects
+            if not body.peek(1):
+                return pa.table({})
+            return pacsv.read_csv(body)
+    
+    @staticmethod
+    def _to_arrow(records: List[Dict]) -> 'pa.Table':
+        """
+        Convert records to a columnar pyarrow Table.
+        
+        High-frequency samples take far less memory as typed columns than
+        as one dictionary per sample, and aggregate without Python loops.
+        
+        Args:
+            records: API records
+            
+        Returns:
+            pyarrow Table with one column per field
+        """
+        import pyarrow as pa
+        
+        return pa.Table.from_pylist(records)
     
     def fetch_sessions(
         self,
@@ -197,8 +335,9 @@ class OpenF1Fetcher:
         session_key: int,
         driver_number: Optional[int] = None,
         date_start: Optional[str] = None,
-        date_end: Optional[str] = None
-    ) -> List[Dict]:
+        date_end: Optional[str] = None,
+        as_arrow: bool = False
+    ) -> Union[List[Dict], 'pa.Table']:
         """
         Fetch car telemetry data (speed, throttle, brake, gear, RPM, DRS).
         
@@ -207,9 +346,11 @@ class OpenF1Fetcher:
             driver_number: Driver number (None = all drivers)
             date_start: Start timestamp (ISO format)
             date_end: End timestamp (ISO format)
+            as_arrow: Return a pyarrow Table (one column per field) instead
+                of a list of dictionaries
             
         Returns:
-            List of car data dictionaries
+            List of car data dictionaries, or a pyarrow Table
         """
         self.logger.info(f"Fetching car data (session={session_key}, driver={driver_number})...")
         
@@ -221,9 +362,9 @@ class OpenF1Fetcher:
         if date_end:
             params['date_end'] = date_end
         
-        data = self._make_request(self.endpoints['car_data'], params)
+        data = self._make_request(self.endpoints['car_data'], params, as_arrow=as_arrow)
         if data is None:
-            return []
+            data = self._to_arrow([]) if as_arrow else []
         
         self.logger.info(f"Fetched {len(data)} car data records")
         return data
@@ -233,8 +374,9 @@ class OpenF1Fetcher:
         session_key: int,
         driver_number: Optional[int] = None,
         date_start: Optional[str] = None,
-        date_end: Optional[str] = None
-    ) -> List[Dict]:
+        date_end: Optional[str] = None,
+        as_arrow: bool = False
+    ) -> Union[List[Dict], 'pa.Table']:
         """
         Fetch GPS position data.
         
@@ -243,9 +385,11 @@ class OpenF1Fetcher:
             driver_number: Driver number (None = all drivers)
             date_start: Start timestamp (ISO format)
             date_end: End timestamp (ISO format)
+            as_arrow: Return a pyarrow Table (one column per field) instead
+                of a list of dictionaries
             
         Returns:
-            List of position dictionaries
+            List of position dictionaries, or a pyarrow Table
         """
         self.logger.info(f"Fetching position data (session={session_key}, driver={driver_number})...")
         
@@ -257,9 +401,9 @@ class OpenF1Fetcher:
         if date_end:
             params['date_end'] = date_end
         
-        data = self._make_request(self.endpoints['position'], params)
+        data = self._make_request(self.endpoints['position'], params, as_arrow=as_arrow)
         if data is None:
-            return []
+            data = self._to_arrow([]) if as_arrow else []
         
         self.logger.info(f"Fetched {len(data)} position records")
         return data
@@ -399,41 +543,48 @@ class OpenF1Fetcher:
             'location': []
         }
         
-        # Fetch laps
-        if driver_numbers:
-            for driver_num in driver_numbers:
-                laps = self.fetch_laps(session_key, driver_number=driver_num)
-                telemetry['laps'].extend(laps)
-        else:
-            telemetry['laps'] = self.fetch_laps(session_key)
-        
-        # Fetch car data
-        if driver_numbers:
-            for driver_num in driver_numbers:
-                car_data = self.fetch_car_data(session_key, driver_number=driver_num)
-                telemetry['car_data'].extend(car_data)
-        else:
-            telemetry['car_data'] = self.fetch_car_data(session_key)
-        
-        # Fetch position data
-        if driver_numbers:
-            for driver_num in driver_numbers:
-                position = self.fetch_position(session_key, driver_number=driver_num)
-                telemetry['position'].extend(position)
-        else:
-            telemetry['position'] = self.fetch_position(session_key)
-        
-        # Fetch track status
-        telemetry['track_status'] = self.fetch_track_status(session_key)
-        
-        # Fetch stints
-        telemetry['stints'] = self.fetch_stints(session_key)
-        
-        # Fetch weather
-        telemetry['weather'] = self.fetch_weather(session_key)
-        
-        # Fetch location/marshal flags
-        telemetry['location'] = self.fetch_location(session_key)
+        # Every endpoint (and, for a few drivers, every driver) is an
+        # independent request, so issue them concurrently; the shared rate
+        # limiter still paces the overall request rate
+        per_driver = {
+            'laps': self.fetch_laps,
+            'car_data': self.fetch_car_data,
+            'position': self.fetch_position
+        }
+        session_wide = {
+            'track_status': self.fetch_track_status,
+            'stints': self.fetch_stints,
+            'weather': self.fetch_weather,
+            'location': self.fetch_location
+        }
+        
+        # For most of the grid, fetch whole sessions and select drivers in
+        # memory: one request per endpoint instead of one per driver
+        filter_in_memory = bool(driver_numbers) and len(driver_numbers) >= self.SESSION_WIDE_MIN_DRIVERS
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = []
+            for data_type, fetch in per_driver.items():
+                if driver_numbers and not filter_in_memory:
+                    for driver_num in driver_numbers:
+                        futures.append((data_type, executor.submit(fetch, session_key, driver_number=driver_num)))
+                else:
+                    futures.append((data_type, executor.submit(fetch, session_key)))
+            for data_type, fetch in session_wide.items():
+                futures.append((data_type, executor.submit(fetch, session_key)))
+            
+            # Collect in submission order so per-driver records keep the
+            # order of driver_numbers
+            for data_type, future in futures:
+                telemetry[data_type].extend(future.result())
+        
+        if filter_in_memory:
+            wanted = set(driver_numbers)
+            for data_type in per_driver:
+                telemetry[data_type] = [
+                    record for record in telemetry[data_type]
+                    if record.get('driver_number') in wanted
+                ]
         
         self.logger.info(f"Fetched complete telemetry for session {session_key}")
         return telemetry
@@ -4,19 +4,32 @@ Scrapes race reports, safety car periods, VSC periods, and red flag data.
 """
 
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+import lxml.html
 import re
 from typing import Dict, List, Optional, Any
 from datetime import datetime
-import yaml
 import time
 
 from utils.logger import get_logger
 from utils.cache_manager import get_cache_manager
 from utils.rate_limiter import get_rate_limiter
+from utils.config_loader import load_config
+from utils.http_session import create_session, DEFAULT_TIMEOUT
 
 logger = get_logger()
 
+# lxml's C parser builds the tree several times faster than html.parser
+HTML_PARSER = 'lxml'
+
+# Race report section classes
+SAFETY_CAR_CLASS_RE = re.compile('safety.*car', re.I)
+RED_FLAG_CLASS_RE = re.compile('red.*flag', re.I)
+
+# Restrict race report parsing to the sections it is read for, so the rest
+# of the document is never turned into a tree
+REPORT_STRAINER = SoupStrainer('div', class_=re.compile('safety|red', re.I))
+
 
 class StatsF1Scraper:
     """Scrapes data from StatsF1 website."""
@@ -33,58 +46,108 @@ class StatsF1Scraper:
         self.rate_limiter = get_rate_limiter().get_limiter('statsf1')
         
         # Load configuration
-        with open(config_path, 'r') as f:
-            config = yaml.safe_load(f)
+        config = load_config(config_path)
         
         self.base_url = config['statsf1']['base_url']
         self.endpoints = config['statsf1']['endpoints']
         self.user_agent = config['statsf1']['user_agent']
+        self.cache_ttls = config['statsf1'].get('cache_ttl') or {}
         
-        self.session = requests.Session()
-        self.session.headers.update({'User-Agent': self.user_agent})
+        self.session = create_session(
+            user_agent=self.user_agent,
+            pool_connections=16,
+            pool_maxsize=32
+        )
         
         self.logger.info(f"Initialized StatsF1 scraper (base URL: {self.base_url})")
     
+    def close(self):
+        """Close the HTTP session and its pooled connections."""
+        self.session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
     def _make_request(
         self,
         url: str,
-        use_cache: bool = True
-    ) -> Optional[BeautifulSoup]:
+        use_cache: bool = True,
+        only: Optional[SoupStrainer] = None,
+        ttl: Optional[int] = None,
+        raw: bool = False
+    ) -> Optional[Any]:
         """
         Make HTTP request and parse HTML.
         
         Args:
             url: URL to scrape
             use_cache: Whether to use cache
+            only: Parse only elements matching this strainer (None = whole page)
+            ttl: Cache time-to-live in seconds (None = cache default)
+            raw: Return the undecoded HTML bytes instead of BeautifulSoup
             
         Returns:
-            BeautifulSoup object or None
+            BeautifulSoup object (or HTML bytes) or None
         """
         # Check cache
         if use_cache:
             cached_data = self.cache.get(url)
-            if cached_data is not None:
+            # Entries cached before pages were stored as bytes are refetched
+            if isinstance(cached_data, bytes):
                 self.logger.debug(f"Cache hit for {url}")
-                return BeautifulSoup(cached_data, 'html.parser')
+                if raw:
+                    return cached_data
+                return BeautifulSoup(cached_data, HTML_PARSER, parse_only=only)
         
         # Rate limiting
         self.rate_limiter._wait_if_needed('statsf1')
         
         try:
             self.rate_limiter.record_call('statsf1')
-            response = self.session.get(url, timeout=30)
+            response = self.session.get(url, timeout=DEFAULT_TIMEOUT)
             response.raise_for_status()
             
-            # Cache raw HTML
+            # Cache raw HTML bytes; the parsers decode them using the
+            # page's own encoding declaration
             if use_cache:
-                self.cache.set(url, response.text)
+                self.cache.set(url, response.content, ttl=ttl)
             
-            return BeautifulSoup(response.text, 'html.parser')
+            if raw:
+                return response.content
+            return BeautifulSoup(response.content, HTML_PARSER, parse_only=only)
         
         except requests.exceptions.RequestException as e:
             self.logger.error(f"Request failed for {url}: {e}")
             return None
     
+    @staticmethod
+    def _extract_table_rows(html: bytes) -> List[List[str]]:
+        """
+        Extract cell text for each row of the page's first table, header excluded.
+        
+        Walks the lxml tree directly instead of building a BeautifulSoup
+        tree and dispatching find_all per row.
+        
+        Args:
+            html: Page HTML bytes (lxml rejects decoded strings that carry
+                an XML encoding declaration)
+            
+        Returns:
+            List of rows, each a list of stripped cell strings
+        """
+        if not html.strip():
+            return []
+        tables = lxml.html.fromstring(html).xpath('(//table)[1]')
+        if not tables:
+            return []
+        return [
+            [td.text_content().strip() for td in row.xpath('./td')]
+            for row in tables[0].xpath('.//tr')[1:]
+        ]
+    
     def _get_circuit_name(self, year: int, round_num: int) -> Optional[str]:
         """
         Get circuit name for a race (simplified - would need mapping).
@@ -127,7 +190,9 @@ class StatsF1Scraper:
             # Try to find race page
             url = f"{self.base_url}/en/{year}.aspx"
         
-        soup = self._make_request(url)
+        soup = self._make_request(
+            url, only=REPORT_STRAINER, ttl=self.cache_ttls.get('race_reports')
+        )
         if soup is None:
             return {}
         
@@ -141,14 +206,14 @@ class StatsF1Scraper:
         }
         
         # Parse safety car periods (example - actual parsing depends on page structure)
-        sc_section = soup.find('div', class_=re.compile('safety.*car', re.I))
+        sc_section = soup.find('div', class_=SAFETY_CAR_CLASS_RE)
         if sc_section:
             # Extract SC periods from table or list
             # This is a placeholder - actual parsing would depend on HTML structure
             pass
         
         # Parse red flags
-        rf_section = soup.find('div', class_=re.compile('red.*flag', re.I))
+        rf_section = soup.find('div', class_=RED_FLAG_CLASS_RE)
         if rf_section:
             # Extract red flag data
             pass
@@ -175,26 +240,21 @@ class StatsF1Scraper:
         if year:
             url = f"{url}?year={year}"
         
-        soup = self._make_request(url)
-        if soup is None:
+        html = self._make_request(url, raw=True)
+        if html is None:
             return []
         
-        sc_periods = []
-        
-        # Find table with safety car data
-        table = soup.find('table')
-        if table:
-            rows = table.find_all('tr')[1:]  # Skip header
-            for row in rows:
-                cols = row.find_all('td')
-                if len(cols) >= 4:
-                    period = {
-                        'year': int(cols[0].text.strip()) if cols[0].text.strip().isdigit() else None,
-                        'race': cols[1].text.strip(),
-                        'lap': cols[2].text.strip() if len(cols) > 2 else None,
-                        'duration': cols[3].text.strip() if len(cols) > 3 else None
-                    }
-                    sc_periods.append(period)
+        # Rows of the table with safety car data
+        sc_periods = [
+            {
+                'year': int(cols[0]) if cols[0].isdigit() else None,
+                'race': cols[1],
+                'lap': cols[2],
+                'duration': cols[3]
+            }
+            for cols in self._extract_table_rows(html)
+            if len(cols) >= 4
+        ]
         
         self.logger.info(f"Scraped {len(sc_periods)} safety car periods")
         return sc_periods
@@ -218,25 +278,20 @@ class StatsF1Scraper:
         if year:
             url = f"{url}?year={year}"
         
-        soup = self._make_request(url)
-        if soup is None:
+        html = self._make_request(url, raw=True)
+        if html is None:
             return []
         
-        red_flags = []
-        
-        # Find table with red flag data
-        table = soup.find('table')
-        if table:
-            rows = table.find_all('tr')[1:]  # Skip header
-            for row in rows:
-                cols = row.find_all('td')
-                if len(cols) >= 3:
-                    flag = {
-                        'year': int(cols[0].text.strip()) if cols[0].text.strip().isdigit() else None,
-                        'race': cols[1].text.strip(),
-                        'reason': cols[2].text.strip() if len(cols) > 2 else None
-                    }
-                    red_flags.append(flag)
+        # Rows of the table with red flag data
+        red_flags = [
+            {
+                'year': int(cols[0]) if cols[0].isdigit() else None,
+                'race': cols[1],
+                'reason': cols[2]
+            }
+            for cols in self._extract_table_rows(html)
+            if len(cols) >= 3
+        ]
         
         self.logger.info(f"Scraped {len(red_flags)} red flags")
         return red_flags
@@ -2,12 +2,13 @@
 
 from etl.data_normalizer import DataNormalizer
 from etl.driver_matcher import DriverMatcher
-from etl.data_merger import DataMerger
+from etl.data_merger import DataMerger, UnifiedResult
 from etl.data_validator import DataValidator
 
 __all__ = [
     'DataNormalizer',
     'DriverMatcher',
     'DataMerger',
+    'UnifiedResult',
     'DataValidator'
 ]
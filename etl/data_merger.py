@@ -3,8 +3,10 @@ Data merger for combining data from all sources.
 Resolves conflicts and creates unified driver/constructor IDs.
 """
 
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterator, List, NamedTuple, Optional, Any, Tuple
 from collections import defaultdict
+from functools import lru_cache
+import unicodedata
 
 from utils.logger import get_logger
 from etl.data_normalizer import DataNormalizer
@@ -12,6 +14,45 @@ from etl.driver_matcher import DriverMatcher
 
 logger = get_logger()
 
+# Result fields taken from the most authoritative source that has them
+RESULT_FIELDS = ('position', 'points', 'status', 'laps', 'time')
+
+
+@lru_cache(maxsize=4096)
+def _merge_key(name: str) -> str:
+    """
+    Build the key records are deduplicated on.
+    
+    Accents are stripped and case folded, so spellings that only differ
+    in encoding or capitalisation ("Räikkönen" / "RAIKKONEN") merge.
+    
+    Args:
+        name: Display name
+        
+    Returns:
+        Accent-free, case-folded name with collapsed whitespace
+    """
+    decomposed = unicodedata.normalize('NFKD', name)
+    stripped = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return ' '.join(stripped.casefold().split())
+
+
+class UnifiedResult(NamedTuple):
+    """
+    One driver's merged result for a race.
+    
+    A tuple rather than a dict: a season of merged results is held in
+    memory, and fixed fields take a fraction of the space.
+    """
+    race_id: int
+    driver_id: Any
+    position: Any
+    points: Any
+    status: str
+    laps: Any
+    time: Any
+    sources: Tuple[str, ...]  # Contributing sources, highest priority first
+
 
 class DataMerger:
     """Merges data from multiple sources."""
@@ -33,8 +74,52 @@ class DataMerger:
             'wikipedia': 3 # Cross-reference only
         }
         
+        # Canonical constructors by merge key (see upsert_constructor)
+        self._constructor_pool: Dict[str, Dict] = {}
+        
+        # Source names (in input order) -> the same names by priority; every
+        # race is merged from the same set of sources
+        self._priority_orders: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+        
         self.logger.info("Initialized data merger")
     
+    def _by_priority(self, by_source: Dict[str, List[Dict]]) -> List[Tuple[str, List[Dict]]]:
+        """
+        Order (source, records) pairs from the most to the least authoritative source.
+        
+        Args:
+            by_source: Dictionary mapping source names to record lists
+            
+        Returns:
+            List of (source, records) tuples, highest priority first
+        """
+        # Keyed on input order too, since equal priorities keep that order
+        names = tuple(by_source)
+        order = self._priority_orders.get(names)
+        if order is None:
+            order = self._priority_orders[names] = tuple(sorted(
+                names,
+                key=lambda source: self.source_priority.get(source, 0),
+                reverse=True
+            ))
+        return [(source, by_source[source]) for source in order]
+    
+    @staticmethod
+    def _fill_missing(unified: Dict, **values: Any):
+        """
+        Set fields the unified record does not have a value for yet.
+        
+        Records are folded in priority order, so each field ends up with the
+        first non-empty value from the most authoritative source.
+        
+        Args:
+            unified: Unified record to update in place
+            **values: Candidate field values from a lower-priority source
+        """
+        for field, value in values.items():
+            if value and not unified.get(field):
+                unified[field] = value
+    
     def merge_drivers(
         self,
         drivers_by_source: Dict[str, List[Dict]]
@@ -56,6 +141,46 @@ class DataMerger:
         self.logger.info(f"Merged {len(unified_drivers)} drivers")
         return unified_drivers
     
+    def upsert_constructor(self, source: str, constructor: Dict) -> Optional[Dict]:
+        """
+        Fold one source constructor into the canonical constructor pool.
+        
+        The first record seen for a merge key becomes the canonical record;
+        later ones only fill its missing fields and add their source ID, so
+        records must arrive in source priority order. merge_constructors
+        starts a fresh pool on every call.
+        
+        Args:
+            source: Source name
+            constructor: Source constructor dictionary
+            
+        Returns:
+            Canonical constructor dictionary, or None if it has no name
+        """
+        constructor_name = constructor.get('name') or ''
+        merge_key = _merge_key(constructor_name)
+        
+        if not merge_key:
+            return None
+        
+        unified = self._constructor_pool.get(merge_key)
+        
+        if unified is None:
+            # Create new unified constructor
+            constructor_id = len(self._constructor_pool) + 1
+            unified = self._constructor_pool[merge_key] = {
+                'constructor_id': constructor_id,
+                'constructor_ref': constructor.get('constructor_ref') or f"constructor_{constructor_id}",
+                'name': constructor_name,
+                'nationality': constructor.get('nationality')
+            }
+        else:
+            self._fill_missing(unified, nationality=constructor.get('nationality'))
+        
+        # Add source-specific ID
+        unified[f'{source}_id'] = constructor.get('id') or constructor.get('constructor_id')
+        return unified
+    
     def merge_constructors(
         self,
         constructors_by_source: Dict[str, List[Dict]]
@@ -71,50 +196,14 @@ class DataMerger:
         """
         self.logger.info("Merging constructors from multiple sources...")
         
-        unified_constructors = []
-        constructor_id_counter = 1
-        seen_names = {}
+        self._constructor_pool = {}
         
         # Process constructors from each source (prioritized)
-        sources_sorted = sorted(
-            constructors_by_source.items(),
-            key=lambda x: self.source_priority.get(x[0], 0),
-            reverse=True
-        )
-        
-        for source, constructors in sources_sorted:
+        for source, constructors in self._by_priority(constructors_by_source):
             for constructor in constructors:
-                constructor_name = constructor.get('name') or ''
-                normalized_name = self.normalizer.normalize_name(constructor_name)
-                
-                if not normalized_name:
-                    continue
-                
-                # Check if we've seen this constructor
-                if normalized_name in seen_names:
-                    # Update existing constructor
-                    existing_id = seen_names[normalized_name]
-                    for unified in unified_constructors:
-                        if unified['constructor_id'] == existing_id:
-                            # Add source-specific ID
-                            unified[f'{source}_id'] = constructor.get('id') or constructor.get('constructor_id')
-                            # Update data if more complete
-                            if not unified.get('nationality') and constructor.get('nationality'):
-                                unified['nationality'] = constructor.get('nationality')
-                            break
-                else:
-                    # Create new unified constructor
-                    unified_constructor = {
-                        'constructor_id': constructor_id_counter,
-                        'constructor_ref': constructor.get('constructor_ref') or f"constructor_{constructor_id_counter}",
-                        'name': constructor_name,
-                        'nationality': constructor.get('nationality'),
-                        f'{source}_id': constructor.get('id') or constructor.get('constructor_id')
-                    }
-                    
-                    unified_constructors.append(unified_constructor)
-                    seen_names[normalized_name] = constructor_id_counter
-                    constructor_id_counter += 1
+                self.upsert_constructor(source, constructor)
+        
+        unified_constructors = list(self._constructor_pool.values())
         
         self.logger.info(f"Merged {len(unified_constructors)} constructors")
         return unified_constructors
@@ -135,16 +224,11 @@ class DataMerger:
         self.logger.info("Merging races from multiple sources...")
         
         unified_races = []
-        race_key_map = {}  # (year, round) -> race_id
+        by_key = {}  # (year, round) -> unified race
         
         # Process races from each source (prioritized)
-        sources_sorted = sorted(
-            races_by_source.items(),
-            key=lambda x: self.source_priority.get(x[0], 0),
-            reverse=True
-        )
-        
-        for source, races in sources_sorted:
+        for source, races in self._by_priority(races_by_source):
+            id_key = f'{source}_race_id'
             for race in races:
                 year = race.get('year') or race.get('season')
                 round_num = race.get('round')
@@ -153,35 +237,31 @@ class DataMerger:
                     continue
                 
                 race_key = (int(year), int(round_num))
+                circuit = race.get('circuit')
+                fields = {
+                    'name': race.get('name') or race.get('raceName'),
+                    'date': race.get('date'),
+                    'circuit_id': race.get('circuit_id'),
+                    'circuit_ref': circuit.get('circuitId') if isinstance(circuit, dict) else circuit
+                }
+                unified = by_key.get(race_key)
                 
-                if race_key in race_key_map:
-                    # Update existing race
-                    race_id = race_key_map[race_key]
-                    for unified in unified_races:
-                        if unified['race_id'] == race_id:
-                            # Merge data (prefer higher priority source)
-                            if not unified.get('name') and race.get('name'):
-                                unified['name'] = race.get('name')
-                            if not unified.get('date') and race.get('date'):
-                                unified['date'] = race.get('date')
-                            # Add source-specific data
-                            unified[f'{source}_race_id'] = race.get('id') or race.get('race_id')
-                            break
-                else:
+                if unified is None:
                     # Create new unified race
-                    unified_race = {
+                    unified = {
                         'race_id': len(unified_races) + 1,
-                        'year': int(year),
-                        'round': int(round_num),
-                        'name': race.get('name') or race.get('raceName'),
-                        'date': race.get('date'),
-                        'circuit_id': race.get('circuit_id'),
-                        'circuit_ref': race.get('circuit', {}).get('circuitId') if isinstance(race.get('circuit'), dict) else race.get('circuit'),
-                        f'{source}_race_id': race.get('id') or race.get('raceId')
+                        'year': race_key[0],
+                        'round': race_key[1],
+                        **fields
                     }
-                    
-                    unified_races.append(unified_race)
-                    race_key_map[race_key] = unified_race['race_id']
+                    unified_races.append(unified)
+                    by_key[race_key] = unified
+                else:
+                    # Sources arrive in priority order, so only fill gaps
+                    self._fill_missing(unified, **fields)
+                
+                # Add source-specific data
+                unified[id_key] = race.get('id') or race.get('raceId') or race.get('race_id')
         
         self.logger.info(f"Merged {len(unified_races)} races")
         return unified_races
@@ -201,93 +281,96 @@ class DataMerger:
         Returns:
             Resolved value
         """
-        if not values:
-            return None
+        # Single pass for the highest priority non-None value; ties keep
+        # the earlier value
+        best_value = None
+        best_priority = float('-inf')
+        for value, priority in zip(values, source_priorities):
+            if value is not None and priority > best_priority:
+                best_value, best_priority = value, priority
         
-        # Remove None values
-        valid_values = [(v, p) for v, p in zip(values, source_priorities) if v is not None]
-        
-        if not valid_values:
-            return None
-        
-        # Return value from highest priority source
-        valid_values.sort(key=lambda x: x[1], reverse=True)
-        return valid_values[0][0]
+        return best_value
     
-    def merge_results(
+    def iter_merged_results(
         self,
         results_by_source: Dict[str, List[Dict]],
         race_id: int
-    ) -> List[Dict]:
+    ) -> Iterator[UnifiedResult]:
         """
-        Merge race results from multiple sources.
+        Merge race results from multiple sources, one driver at a time.
+        
+        Lets a backfill feed results straight into the database without
+        holding every merged result of a season in memory.
         
         Args:
             results_by_source: Dictionary mapping source names to result lists
             race_id: Unified race ID
             
-        Returns:
-            List of merged result dictionaries
+        Yields:
+            Merged result for each driver
         """
-        self.logger.info(f"Merging results for race {race_id}...")
-        
-        unified_results = []
-        
-        # Group results by driver
+        # Group results by driver, visiting sources in priority order so each
+        # driver's results are already ranked
         results_by_driver = defaultdict(list)
         
-        for source, results in results_by_source.items():
+        for source, results in self._by_priority(results_by_source):
             for result in results:
                 driver_id = result.get('driver_id')
                 if driver_id:
                     results_by_driver[driver_id].append((result, source))
         
-        # Merge results for each driver
+        # Each distinct raw status is normalized once per race
+        normalize_status = self.normalizer.normalize_status
+        statuses: Dict[str, str] = {}
+        
         for driver_id, driver_results in results_by_driver.items():
-            if len(driver_results) == 1:
-                # Single source
-                result, source = driver_results[0]
-                unified_result = {
-                    'race_id': race_id,
-                    'driver_id': driver_id,
-                    'position': result.get('position'),
-                    'points': result.get('points'),
-                    'status': self.normalizer.normalize_status(result.get('status', '')),
-                    'laps': result.get('laps'),
-                    'time': result.get('time'),
-                    'source': source
-                }
-            else:
-                # Multiple sources - resolve conflicts
-                positions = [r.get('position') for r, s in driver_results]
-                priorities = [self.source_priority.get(s, 0) for r, s in driver_results]
-                
-                unified_result = {
-                    'race_id': race_id,
-                    'driver_id': driver_id,
-                    'position': self.resolve_conflict(positions, priorities),
-                    'points': self.resolve_conflict(
-                        [r.get('points') for r, s in driver_results],
-                        priorities
-                    ),
-                    'status': self.normalizer.normalize_status(
-                        self.resolve_conflict(
-                            [r.get('status', '') for r, s in driver_results],
-                            priorities
-                        ) or ''
-                    ),
-                    'laps': self.resolve_conflict(
-                        [r.get('laps') for r, s in driver_results],
-                        priorities
-                    ),
-                    'time': self.resolve_conflict(
-                        [r.get('time') for r, s in driver_results],
-                        priorities
-                    ),
-                    'sources': [s for r, s in driver_results]
-                }
+            # Fill the fields in one pass over the ranked results, stopping
+            # once every field has a value (usually after the first)
+            merged = dict.fromkeys(RESULT_FIELDS)
+            missing = RESULT_FIELDS
+            for result, _ in driver_results:
+                for field in missing:
+                    value = result.get(field)
+                    if value is not None:
+                        merged[field] = value
+                missing = [field for field in missing if merged[field] is None]
+                if not missing:
+                    break
+            
+            raw_status = merged['status'] or ''
+            status = statuses.get(raw_status)
+            if status is None:
+                status = statuses[raw_status] = normalize_status(raw_status)
+            
+            yield UnifiedResult(
+                race_id=race_id,
+                driver_id=driver_id,
+                position=merged['position'],
+                points=merged['points'],
+                status=status,
+                laps=merged['laps'],
+                time=merged['time'],
+                sources=tuple(s for r, s in driver_results)
+            )
+    
+    def merge_results(
+        self,
+        results_by_source: Dict[str, List[Dict]],
+        race_id: int
+    ) -> List[UnifiedResult]:
+        """
+        Merge race results from multiple sources.
+        
+        Args:
+            results_by_source: Dictionary mapping source names to result lists
+            race_id: Unified race ID
             
-            unified_results.append(unified_result)
+        Returns:
+            List of merged results (use ._asdict() where a dictionary is needed)
+        """
+        self.logger.info(f"Merging results for race {race_id}...")
+        
+        unified_results = list(self.iter_merged_results(results_by_source, race_id))
         
         self.logger.info(f"Merged {len(unified_results)} results")
         return unified_results
@@ -3,16 +3,121 @@ Data normalizer for F1 dataset.
 Normalizes timestamps to UTC, aligns lap numbers, standardizes status codes, and normalizes names.
 """
 
-from datetime import datetime
-from typing import Dict, List, Optional, Any
-import pytz
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Any
+from zoneinfo import ZoneInfo
 import re
 
 from utils.logger import get_logger
 
+# ciso8601 parses ISO 8601 in C, several times faster than fromisoformat;
+# it is optional
+try:
+    import ciso8601
+except ImportError:
+    ciso8601 = None
+
 logger = get_logger()
 
 
+@lru_cache(maxsize=8192)
+def _normalize_name(name: str) -> str:
+    """
+    Collapse whitespace and title-case a name.
+    
+    Cached because the same driver, constructor and circuit names recur
+    across every source and race being merged.
+    """
+    # Title case (but preserve all-caps abbreviations, e.g. "F1", "GP");
+    # split() without arguments also drops extra whitespace
+    return ' '.join([
+        word if len(word) <= 3 and word.isupper() else word.capitalize()
+        for word in name.split()
+    ])
+
+
+@lru_cache(maxsize=1024)
+def _normalize_circuit_name(name: str) -> str:
+    """Title-case a circuit name and shorten common variations."""
+    name = _CIRCUIT_NAME_RE.sub(
+        lambda m: CIRCUIT_NAME_SUBSTITUTIONS[m.group(0)], _normalize_name(name)
+    )
+    return name.strip()
+
+
+def _parse_timestamp(text: str) -> Optional[datetime]:
+    """Parse an ISO 8601 timestamp string, or return None if it is not one."""
+    if ciso8601 is not None:
+        try:
+            return ciso8601.parse_datetime(text)
+        except ValueError:
+            # Fall through so the result does not depend on whether
+            # ciso8601 is installed
+            pass
+    
+    try:
+        return datetime.fromisoformat(text.replace('Z', '+00:00'))
+    except ValueError:
+        pass
+    
+    # Fractional seconds of other than 3 or 6 digits, which fromisoformat
+    # rejects before Python 3.11
+    match = _TIMESTAMP_RE.match(text)
+    if match is None:
+        return None
+    *fields, fraction = match.groups()
+    try:
+        return datetime(*map(int, fields), int(fraction.ljust(6, '0')))
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=64)
+def _get_zone(name: str) -> ZoneInfo:
+    """Look up an IANA time zone once per name."""
+    return ZoneInfo(name)
+
+
+# Status code mappings (keys matched case-insensitively)
+STATUS_MAPPINGS = {
+    'Finished': 'Finished',
+    'F': 'Finished',
+    'DNF': 'DNF',
+    'Did not finish': 'DNF',
+    'Not classified': 'DNF',
+    'NC': 'DNF',
+    'DNS': 'DNS',
+    'Did not start': 'DNS',
+    'DSQ': 'DSQ',
+    'Disqualified': 'DSQ',
+    'EX': 'DSQ',
+    'WD': 'Withdrew',
+    'Withdrew': 'Withdrew',
+    'Retired': 'DNF',
+    'R': 'DNF'
+}
+
+UTC = timezone.utc
+
+# Naive timestamp with fractional seconds (YYYY-MM-DD HH:MM:SS.f)
+_TIMESTAMP_RE = re.compile(r'(\d{4})-(\d{2})-(\d{2})[T ](\d{2}):(\d{2}):(\d{2})\.(\d{1,6})$')
+
+_NON_DIGIT_RE = re.compile(r'[^0-9]')
+_LEADING_PLUS_RE = re.compile(r'^\+')
+_NON_TIME_CHAR_RE = re.compile(r'[^\d:.]')
+# M:SS.mmm or H:MM:SS.mmm
+_TIME_FORMAT_RE = re.compile(r'^\d+:\d{2}(:\d{2})?(\.\d+)?$')
+
+# Circuit name variations, replaced in a single pass
+CIRCUIT_NAME_SUBSTITUTIONS = {
+    'Grand Prix': 'GP',
+    'International Circuit': 'Circuit',
+    'Racing Circuit': 'Circuit'
+}
+_CIRCUIT_NAME_RE = re.compile('|'.join(map(re.escape, CIRCUIT_NAME_SUBSTITUTIONS)))
+
+
 class DataNormalizer:
     """Normalizes F1 data for consistency."""
     
@@ -24,26 +129,10 @@ class DataNormalizer:
             timezone: Target timezone for normalization (default: UTC)
         """
         self.logger = logger
-        self.target_timezone = pytz.timezone(timezone)
-        
-        # Status code mappings
-        self.status_mappings = {
-            'Finished': 'Finished',
-            'F': 'Finished',
-            'DNF': 'DNF',
-            'Did not finish': 'DNF',
-            'Not classified': 'DNF',
-            'NC': 'DNF',
-            'DNS': 'DNS',
-            'Did not start': 'DNS',
-            'DSQ': 'DSQ',
-            'Disqualified': 'DSQ',
-            'EX': 'DSQ',
-            'WD': 'Withdrew',
-            'Withdrew': 'Withdrew',
-            'Retired': 'DNF',
-            'R': 'DNF'
-        }
+        self.target_timezone = _get_zone(timezone)
+        
+        # Status code mappings, keyed by the uppercased form normalize_status looks up
+        self.status_mappings = {k.upper(): v for k, v in STATUS_MAPPINGS.items()}
         
         self.logger.info(f"Initialized data normalizer (timezone: {timezone})")
     
@@ -70,41 +159,70 @@ class DataNormalizer:
             dt = timestamp
         # If string, try to parse
         elif isinstance(timestamp, str):
-            try:
-                # Try ISO format first
-                dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-            except ValueError:
-                try:
-                    # Try common formats
-                    for fmt in ['%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M:%S.%f']:
-                        try:
-                            dt = datetime.strptime(timestamp, fmt)
-                            break
-                        except ValueError:
-                            continue
-                    else:
-                        self.logger.warning(f"Could not parse timestamp: {timestamp}")
-                        return None
-                except Exception as e:
-                    self.logger.warning(f"Error parsing timestamp {timestamp}: {e}")
-                    return None
+            dt = _parse_timestamp(timestamp)
+            if dt is None:
+                self.logger.warning(f"Could not parse timestamp: {timestamp}")
+                return None
         else:
             self.logger.warning(f"Unknown timestamp type: {type(timestamp)}")
             return None
         
+        # Already UTC (the usual API form, 'Z' or '+00:00'): nothing to convert
+        if dt.tzinfo is UTC:
+            return dt
+        
         # Handle timezone
         if dt.tzinfo is None:
             # No timezone info - assume source timezone or UTC
             if source_timezone:
-                source_tz = pytz.timezone(source_timezone)
-                dt = source_tz.localize(dt)
+                dt = dt.replace(tzinfo=_get_zone(source_timezone))
             else:
                 # Assume UTC
-                dt = pytz.UTC.localize(dt)
+                return dt.replace(tzinfo=UTC)
         
         # Convert to target timezone (UTC)
-        dt_utc = dt.astimezone(pytz.UTC)
-        return dt_utc
+        return dt.astimezone(UTC)
+    
+    def normalize_timestamps(
+        self,
+        timestamps: Iterable[Any],
+        source_timezone: Optional[str] = None
+    ) -> List[Optional[datetime]]:
+        """
+        Normalize a column of timestamps to UTC.
+        
+        Same result as normalize_timestamp per value; the source zone is
+        resolved once and strings and datetimes are converted inline,
+        with anything else handed to normalize_timestamp.
+        
+        Args:
+            timestamps: Timestamps (datetime, string, or None)
+            source_timezone: Source timezone of naive timestamps (if known)
+            
+        Returns:
+            List of normalized datetimes in UTC (None where not parseable)
+        """
+        naive_zone = _get_zone(source_timezone) if source_timezone else UTC
+        normalized = []
+        
+        for timestamp in timestamps:
+            if isinstance(timestamp, str):
+                dt = _parse_timestamp(timestamp)
+                if dt is None:
+                    self.logger.warning(f"Could not parse timestamp: {timestamp}")
+                    normalized.append(None)
+                    continue
+            elif isinstance(timestamp, datetime):
+                dt = timestamp
+            else:
+                normalized.append(self.normalize_timestamp(timestamp, source_timezone))
+                continue
+            
+            if dt.tzinfo is None:
+                dt = dt.replace(tzinfo=naive_zone)
+            normalized.append(dt if dt.tzinfo is UTC else dt.astimezone(UTC))
+        
+        return normalized
     
     def normalize_status(self, status: str) -> str:
         """
@@ -138,6 +256,28 @@ class DataNormalizer:
         # Return original if no match
         return status.strip()
     
+    def normalize_status_many(self, statuses: Iterable[str]) -> List[str]:
+        """
+        Normalize a column of status codes.
+        
+        A column repeats a handful of values ("Finished", "+1 Lap", ...),
+        so each distinct status goes through normalize_status once.
+        
+        Args:
+            statuses: Status strings
+            
+        Returns:
+            List of normalized status codes
+        """
+        seen: Dict[str, str] = {}
+        normalized = []
+        for status in statuses:
+            code = seen.get(status)
+            if code is None:
+                code = seen[status] = self.normalize_status(status)
+            normalized.append(code)
+        return normalized
+    
     def normalize_name(self, name: str) -> str:
         """
         Normalize name (driver, constructor, circuit).
@@ -151,22 +291,7 @@ class DataNormalizer:
         if not name:
             return ''
         
-        # Remove extra whitespace
-        name = ' '.join(name.split())
-        
-        # Title case (but preserve known abbreviations)
-        # This is a simplified approach - may need more sophisticated handling
-        words = name.split()
-        normalized_words = []
-        
-        for word in words:
-            # Preserve all-caps abbreviations (e.g., "F1", "GP")
-            if word.isupper() and len(word) <= 3:
-                normalized_words.append(word)
-            else:
-                normalized_words.append(word.capitalize())
-        
-        return ' '.join(normalized_words)
+        return _normalize_name(name)
     
     def normalize_circuit_name(self, name: str) -> str:
         """
@@ -181,15 +306,7 @@ class DataNormalizer:
         if not name:
             return ''
         
-        # Circuit names often have specific formats
-        name = self.normalize_name(name)
-        
-        # Common variations
-        name = name.replace('Grand Prix', 'GP')
-        name = name.replace('International Circuit', 'Circuit')
-        name = name.replace('Racing Circuit', 'Circuit')
-        
-        return name.strip()
+        return _normalize_circuit_name(name)
     
     def align_lap_number(
         self,
@@ -213,7 +330,7 @@ class DataNormalizer:
             # Convert to int
             if isinstance(lap, str):
                 # Remove non-numeric characters
-                lap_str = re.sub(r'[^0-9]', '', lap)
+                lap_str = _NON_DIGIT_RE.sub('', lap)
                 if lap_str:
                     return int(lap_str)
                 else:
@@ -227,6 +344,32 @@ class DataNormalizer:
             self.logger.warning(f"Could not normalize lap number {lap} from {source}: {e}")
             return None
     
+    def align_lap_numbers(
+        self,
+        laps: Iterable[Any],
+        source: str = "unknown"
+    ) -> List[Optional[int]]:
+        """
+        Align a column of lap numbers.
+        
+        Same result as align_lap_number per value, but plain ints and
+        all-digit strings (nearly every lap in practice) skip the type
+        dispatch and regex.
+        
+        Args:
+            laps: Lap numbers (int, string, or None)
+            source: Data source name
+            
+        Returns:
+            List of normalized lap numbers (None where not parseable)
+        """
+        return [
+            lap if type(lap) is int
+            else int(lap) if type(lap) is str and lap.isascii() and lap.isdigit()
+            else self.align_lap_number(lap, source)
+            for lap in laps
+        ]
+    
     def normalize_time_string(self, time_str: str) -> Optional[str]:
         """
         Normalize time string (lap time, sector time, etc.).
@@ -243,11 +386,11 @@ class DataNormalizer:
         time_str = time_str.strip()
         
         # Remove common prefixes/suffixes
-        time_str = re.sub(r'^\+', '', time_str)  # Remove leading +
-        time_str = re.sub(r'[^\d:.]', '', time_str)  # Keep only digits, :, and .
+        time_str = _LEADING_PLUS_RE.sub('', time_str)  # Remove leading +
+        time_str = _NON_TIME_CHAR_RE.sub('', time_str)  # Keep only digits, :, and .
         
         # Validate format (should be M:SS.mmm or H:MM:SS.mmm)
-        if re.match(r'^\d+:\d{2}(:\d{2})?(\.\d+)?$', time_str):
+        if _TIME_FORMAT_RE.match(time_str):
             return time_str
         
         return None
@@ -326,7 +469,7 @@ class DataNormalizer:
         try:
             if isinstance(position, str):
                 # Remove non-numeric characters
-                pos_str = re.sub(r'[^0-9]', '', position)
+                pos_str = _NON_DIGIT_RE.sub('', position)
                 if pos_str:
                     return int(pos_str)
                 else:
@@ -341,4 +484,23 @@ class DataNormalizer:
                 return None
         except (ValueError, TypeError):
             return None
-
+    
+    def normalize_positions(self, positions: Iterable[Any]) -> List[Optional[int]]:
+        """
+        Normalize a column of positions.
+        
+        Same result as normalize_position per value, with a fast path for
+        plain ints and all-digit strings.
+        
+        Args:
+            positions: Positions (int, string, or None)
+            
+        Returns:
+            List of normalized positions (None where not parseable)
+        """
+        return [
+            (position if position > 0 else None) if type(position) is int
+            else int(position) if type(position) is str and position.isascii() and position.isdigit()
+            else self.normalize_position(position)
+            for position in positions
+        ]
@@ -3,14 +3,46 @@ Data validator for F1 dataset.
 Validates data completeness, checks foreign keys, detects anomalies, and generates quality reports.
 """
 
-from typing import Dict, List, Optional, Any, Set
+from typing import Dict, List, Optional, Any, Set, Tuple
 from collections import defaultdict
+from datetime import datetime, timedelta, timezone
 import sqlite3
+from pathlib import Path
 
 from utils.logger import get_logger
 
 logger = get_logger()
 
+# Foreign keys checked by validate_foreign_keys:
+# (child table, child primary key, foreign key column, parent table,
+#  parent primary key, child label, parent label)
+FOREIGN_KEY_CHECKS = [
+    ('races', 'race_id', 'season_id', 'seasons', 'season_id', 'Race', 'season'),
+    ('races', 'race_id', 'circuit_id', 'circuits', 'circuit_id', 'Race', 'circuit'),
+    ('race_results', 'result_id', 'race_id', 'races', 'race_id', 'Result', 'race'),
+    ('race_results', 'result_id', 'driver_id', 'drivers', 'driver_id', 'Result', 'driver'),
+    ('race_results', 'result_id', 'constructor_id', 'constructors', 'constructor_id', 'Result', 'constructor'),
+    ('lap_times', 'lap_time_id', 'race_id', 'races', 'race_id', 'Lap time', 'race'),
+    ('lap_times', 'lap_time_id', 'driver_id', 'drivers', 'driver_id', 'Lap time', 'driver'),
+]
+
+# Plausible lap time range (10 seconds to 10 minutes)
+MIN_LAP_MS = 10000
+MAX_LAP_MS = 600000
+
+# How far ahead a race date may lie before it is flagged
+FUTURE_DATE_LIMIT = timedelta(days=365)
+
+# Per-row anomaly checks: (table, anomaly type, condition on the row "c",
+# indexed); named parameters are bound by _check_rows. Indexed checks run as
+# their own query so SQLite can answer them from the index instead of
+# folding them into the table scan.
+ROW_ANOMALY_CHECKS = [
+    ('lap_times', 'impossible_lap_time', 'c.milliseconds < :min_lap_ms OR c.milliseconds > :max_lap_ms', True),
+    ('race_results', 'invalid_position', 'c.position < 1', False),
+    ('races', 'future_date', 'c.date > :future_cutoff', False),
+]
+
 
 class DataValidator:
     """Validates F1 dataset quality."""
@@ -27,8 +59,45 @@ class DataValidator:
         self.errors = []
         self.warnings = []
         
+        # Read-only connection shared by all checks, opened on first use
+        self._conn: Optional[sqlite3.Connection] = None
+        
         self.logger.info(f"Initialized data validator (database: {db_path})")
     
+    def _get_connection(self) -> sqlite3.Connection:
+        """
+        Get the shared read-only database connection, opening it if needed.
+        
+        Returns:
+            SQLite connection
+        """
+        if self._conn is None:
+            # as_uri() percent-encodes characters such as ?, # and % and
+            # handles drive letters
+            uri = Path(self.db_path).resolve().as_uri() + "?mode=ro"
+            conn = sqlite3.connect(uri, uri=True)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA query_only = 1")
+            # Validation reads whole tables: map the file and keep a larger
+            # page cache (64 MiB) so later checks find the pages still cached
+            conn.execute("PRAGMA mmap_size = 268435456")
+            conn.execute("PRAGMA cache_size = -65536")
+            conn.execute("PRAGMA temp_store = MEMORY")
+            self._conn = conn
+        return self._conn
+    
+    def close(self):
+        """Close the database connection."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+    
     def validate_foreign_keys(self) -> Dict[str, List[str]]:
         """
         Validate foreign key relationships.
@@ -38,90 +107,169 @@ class DataValidator:
         """
         self.logger.info("Validating foreign keys...")
         
+        errors, _ = self._check_rows(foreign_keys=True, anomalies=False)
+        
+        self.logger.info(f"Found {sum(len(v) for v in errors.values())} foreign key errors")
+        return errors
+    
+    def _check_rows(
+        self,
+        foreign_keys: bool = True,
+        anomalies: bool = True
+    ) -> Tuple[Dict[str, List[str]], List[Dict[str, Any]]]:
+        """
+        Run foreign key and anomaly checks with one scan per table.
+        
+        All checks on a table are OR-ed into a single query with one flag
+        column per check, so large tables such as lap_times are read once
+        rather than once per check. Indexed anomaly checks are the exception
+        and run on their own so the index is used.
+        
+        Args:
+            foreign_keys: Run the FOREIGN_KEY_CHECKS
+            anomalies: Run the anomaly checks
+            
+        Returns:
+            Tuple of (foreign key errors by table, anomalies)
+        """
         errors = defaultdict(list)
+        found = []
+        
+        fk_checks = FOREIGN_KEY_CHECKS if foreign_keys else []
+        anomaly_checks = ROW_ANOMALY_CHECKS if anomalies else []
+        # Bound once rather than evaluated by SQLite for every row
+        params = {
+            'min_lap_ms': MIN_LAP_MS,
+            'max_lap_ms': MAX_LAP_MS,
+            'future_cutoff': (datetime.now(timezone.utc) + FUTURE_DATE_LIMIT).strftime('%Y-%m-%d')
+        }
         
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            cursor = self._get_connection().cursor()
             
-            # Check races -> seasons
-            cursor.execute("""
-                SELECT r.race_id, r.season_id
-                FROM races r
-                LEFT JOIN seasons s ON r.season_id = s.season_id
-                WHERE s.season_id IS NULL
-            """)
-            for row in cursor.fetchall():
-                errors['races'].append(f"Race {row[0]} references non-existent season {row[1]}")
+            # Matches per check, kept apart so results stay grouped by check
+            fk_hits = [[] for _ in fk_checks]
+            anomaly_hits = [[] for _ in anomaly_checks]
             
-            # Check races -> circuits
-            cursor.execute("""
-                SELECT r.race_id, r.circuit_id
-                FROM races r
-                LEFT JOIN circuits c ON r.circuit_id = c.circuit_id
-                WHERE c.circuit_id IS NULL
-            """)
-            for row in cursor.fetchall():
-                errors['races'].append(f"Race {row[0]} references non-existent circuit {row[1]}")
-            
-            # Check race_results -> races
-            cursor.execute("""
-                SELECT rr.result_id, rr.race_id
-                FROM race_results rr
-                LEFT JOIN races r ON rr.race_id = r.race_id
-                WHERE r.race_id IS NULL
-            """)
-            for row in cursor.fetchall():
-                errors['race_results'].append(f"Result {row[0]} references non-existent race {row[1]}")
-            
-            # Check race_results -> drivers
-            cursor.execute("""
-                SELECT rr.result_id, rr.driver_id
-                FROM race_results rr
-                LEFT JOIN drivers d ON rr.driver_id = d.driver_id
-                WHERE d.driver_id IS NULL
-            """)
-            for row in cursor.fetchall():
-                errors['race_results'].append(f"Result {row[0]} references non-existent driver {row[1]}")
+            tables = dict.fromkeys(
+                [check[0] for check in fk_checks]
+                + [check[0] for check in anomaly_checks if not check[3]]
+            )
+            for table in tables:
+                flags = []
+                hits = []
+                for check, check_hits in zip(fk_checks, fk_hits):
+                    child, _, fk, parent, parent_pk, _, _ = check
+                    if child == table:
+                        # NOT EXISTS is a primary key lookup per child row
+                        flags.append(
+                            f"NOT EXISTS (SELECT 1 FROM {parent} p WHERE p.{parent_pk} = c.{fk})"
+                        )
+                        hits.append(check_hits)
+                for (check_table, _, condition, indexed), check_hits in zip(anomaly_checks, anomaly_hits):
+                    if check_table == table and not indexed:
+                        flags.append(f"({condition})")
+                        hits.append(check_hits)
+                
+                flag_columns = ', '.join(
+                    f"{flag} AS _flag{i}" for i, flag in enumerate(flags)
+                )
+                cursor.execute(f"""
+                    SELECT c.*, {flag_columns}
+                    FROM {table} c
+                    WHERE {' OR '.join(f'_flag{i}' for i in range(len(flags)))}
+                """, params)
+                for row in cursor:
+                    for i, check_hits in enumerate(hits):
+                        if row[f'_flag{i}']:
+                            check_hits.append(row)
             
-            # Check race_results -> constructors
-            cursor.execute("""
-                SELECT rr.result_id, rr.constructor_id
-                FROM race_results rr
-                LEFT JOIN constructors c ON rr.constructor_id = c.constructor_id
-                WHERE c.constructor_id IS NULL
-            """)
-            for row in cursor.fetchall():
-                errors['race_results'].append(f"Result {row[0]} references non-existent constructor {row[1]}")
+            for (table, _, condition, indexed), check_hits in zip(anomaly_checks, anomaly_hits):
+                if indexed:
+                    cursor.execute(f"SELECT c.* FROM {table} c WHERE {condition}", params)
+                    check_hits.extend(cursor.fetchall())
             
-            # Check lap_times -> races
-            cursor.execute("""
-                SELECT lt.lap_time_id, lt.race_id
-                FROM lap_times lt
-                LEFT JOIN races r ON lt.race_id = r.race_id
-                WHERE r.race_id IS NULL
-            """)
-            for row in cursor.fetchall():
-                errors['lap_times'].append(f"Lap time {row[0]} references non-existent race {row[1]}")
+            for (child, child_pk, fk, _, _, child_label, parent_label), rows in zip(fk_checks, fk_hits):
+                for row in rows:
+                    errors[child].append(
+                        f"{child_label} {row[child_pk]} references non-existent {parent_label} {row[fk]}"
+                    )
             
-            # Check lap_times -> drivers
-            cursor.execute("""
-                SELECT lt.lap_time_id, lt.driver_id
-                FROM lap_times lt
-                LEFT JOIN drivers d ON lt.driver_id = d.driver_id
-                WHERE d.driver_id IS NULL
-            """)
-            for row in cursor.fetchall():
-                errors['lap_times'].append(f"Lap time {row[0]} references non-existent driver {row[1]}")
+            for (_, kind, _, _), rows in zip(anomaly_checks, anomaly_hits):
+                found.extend(self._row_anomaly(kind, row) for row in rows)
             
-            conn.close()
+            if anomalies:
+                # Check for duplicate positions in race results
+                cursor.execute("""
+                    SELECT race_id, position, COUNT(*) as count
+                    FROM race_results
+                    WHERE position IS NOT NULL
+                    GROUP BY race_id, position
+                    HAVING count > 1
+                """)
+                for row in cursor.fetchall():
+                    found.append({
+                        'type': 'duplicate_position',
+                        'table': 'race_results',
+                        'race_id': row[0],
+                        'position': row[1],
+                        'count': row[2],
+                        'message': f"Duplicate position {row[1]} in race {row[0]}"
+                    })
         
         except Exception as e:
-            self.logger.error(f"Error validating foreign keys: {e}")
-            errors['system'].append(str(e))
+            if foreign_keys:
+                self.logger.error(f"Error validating foreign keys: {e}")
+                errors['system'].append(str(e))
+            if anomalies:
+                self.logger.error(f"Error detecting anomalies: {e}")
+                found.append({
+                    'type': 'system_error',
+                    'message': str(e)
+                })
         
-        self.logger.info(f"Found {sum(len(v) for v in errors.values())} foreign key errors")
-        return dict(errors)
+        return dict(errors), found
+    
+    @staticmethod
+    def _row_anomaly(kind: str, row: sqlite3.Row) -> Dict[str, Any]:
+        """
+        Describe a row flagged by one of the ROW_ANOMALY_CHECKS.
+        
+        Args:
+            kind: Anomaly type of the check
+            row: Flagged row
+            
+        Returns:
+            Anomaly dictionary
+        """
+        if kind == 'impossible_lap_time':
+            return {
+                'type': kind,
+                'table': 'lap_times',
+                'id': row['lap_time_id'],
+                'race_id': row['race_id'],
+                'driver_id': row['driver_id'],
+                'lap': row['lap'],
+                'value': row['milliseconds'],
+                'message': f"Lap time {row['milliseconds']}ms seems impossible"
+            }
+        if kind == 'invalid_position':
+            return {
+                'type': kind,
+                'table': 'race_results',
+                'id': row['result_id'],
+                'race_id': row['race_id'],
+                'value': row['position'],
+                'message': f"Invalid position {row['position']}"
+            }
+        # future_date
+        return {
+            'type': kind,
+            'table': 'races',
+            'race_id': row['race_id'],
+            'date': row['date'],
+            'message': f"Race date {row['date']} is in the future"
+        }
     
     def validate_data_completeness(self) -> Dict[str, Dict[str, Any]]:
         """
@@ -135,8 +283,7 @@ class DataValidator:
         completeness = {}
         
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            cursor = self._get_connection().cursor()
             
             # Count records in each table
             tables = [
@@ -173,8 +320,6 @@ class DataValidator:
             """)
             races_without_lap_times = cursor.fetchone()[0]
             completeness['races_without_lap_times'] = races_without_lap_times
-            
-            conn.close()
         
         except Exception as e:
             self.logger.error(f"Error validating completeness: {e}")
@@ -191,87 +336,7 @@ class DataValidator:
         """
         self.logger.info("Detecting anomalies...")
         
-        anomalies = []
-        
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Check for impossible lap times (< 10 seconds or > 10 minutes)
-            cursor.execute("""
-                SELECT lap_time_id, race_id, driver_id, lap, milliseconds
-                FROM lap_times
-                WHERE milliseconds < 10000 OR milliseconds > 600000
-            """)
-            for row in cursor.fetchall():
-                anomalies.append({
-                    'type': 'impossible_lap_time',
-                    'table': 'lap_times',
-                    'id': row[0],
-                    'race_id': row[1],
-                    'driver_id': row[2],
-                    'lap': row[3],
-                    'value': row[4],
-                    'message': f"Lap time {row[4]}ms seems impossible"
-                })
-            
-            # Check for duplicate positions in race results
-            cursor.execute("""
-                SELECT race_id, position, COUNT(*) as count
-                FROM race_results
-                WHERE position IS NOT NULL
-                GROUP BY race_id, position
-                HAVING count > 1
-            """)
-            for row in cursor.fetchall():
-                anomalies.append({
-                    'type': 'duplicate_position',
-                    'table': 'race_results',
-                    'race_id': row[0],
-                    'position': row[1],
-                    'count': row[2],
-                    'message': f"Duplicate position {row[1]} in race {row[0]}"
-                })
-            
-            # Check for negative positions
-            cursor.execute("""
-                SELECT result_id, race_id, position
-                FROM race_results
-                WHERE position < 1
-            """)
-            for row in cursor.fetchall():
-                anomalies.append({
-                    'type': 'invalid_position',
-                    'table': 'race_results',
-                    'id': row[0],
-                    'race_id': row[1],
-                    'value': row[2],
-                    'message': f"Invalid position {row[2]}"
-                })
-            
-            # Check for future dates
-            cursor.execute("""
-                SELECT race_id, date
-                FROM races
-                WHERE date > date('now', '+1 year')
-            """)
-            for row in cursor.fetchall():
-                anomalies.append({
-                    'type': 'future_date',
-                    'table': 'races',
-                    'race_id': row[0],
-                    'date': row[1],
-                    'message': f"Race date {row[1]} is in the future"
-                })
-            
-            conn.close()
-        
-        except Exception as e:
-            self.logger.error(f"Error detecting anomalies: {e}")
-            anomalies.append({
-                'type': 'system_error',
-                'message': str(e)
-            })
+        _, anomalies = self._check_rows(foreign_keys=False, anomalies=True)
         
         self.logger.info(f"Detected {len(anomalies)} anomalies")
         return anomalies
@@ -285,10 +350,13 @@ class DataValidator:
         """
         self.logger.info("Generating data quality report...")
         
+        # Foreign key and anomaly checks share one scan of each table
+        foreign_key_errors, anomalies = self._check_rows()
+        
         report = {
-            'foreign_key_errors': self.validate_foreign_keys(),
+            'foreign_key_errors': foreign_key_errors,
             'completeness': self.validate_data_completeness(),
-            'anomalies': self.detect_anomalies(),
+            'anomalies': anomalies,
             'summary': {}
         }
         
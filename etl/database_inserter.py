@@ -3,8 +3,12 @@ Database inserter for F1 dataset.
 Handles insertion of fetched data into the SQLite database.
 """
 
+import re
 import sqlite3
-from typing import Dict, List, Optional, Any
+from contextlib import contextmanager
+from functools import lru_cache
+from itertools import chain
+from typing import Dict, Iterator, List, Optional, Any, Sequence, Tuple
 from datetime import datetime
 from pathlib import Path
 
@@ -12,6 +16,82 @@ from utils.logger import get_logger
 
 logger = get_logger()
 
+# INSERT ... RETURNING needs SQLite 3.35+
+SQLITE_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+# Bound parameters allowed per statement (raised from 999 in SQLite 3.32)
+SQLITE_MAX_VARIABLES = 32766 if sqlite3.sqlite_version_info >= (3, 32, 0) else 999
+
+# ISO 8601 date or timestamp as sent by OpenF1, e.g.
+# 2023-09-17T13:02:11.123000+00:00; groups: date, time, fraction, offset
+ISO_TIMESTAMP_RE = re.compile(
+    r'(\d{4}-\d{2}-\d{2})(?:[T ](\d{2}:\d{2}:\d{2})(?:\.(\d+))?(Z|[+-]\d{2}:\d{2})?)?$'
+)
+
+# Tables whose secondary indexes bulk_mode defers
+BULK_TABLES = ('lap_times', 'telemetry_position')
+# "CREATE [UNIQUE] INDEX" prefix of a stored index definition that does
+# not already say IF NOT EXISTS
+CREATE_INDEX_RE = re.compile(r'^\s*CREATE\s+(UNIQUE\s+)?INDEX(?!\s+IF\s+NOT\s+EXISTS)', re.IGNORECASE)
+
+LAP_TIME_COLUMNS = ('race_id', 'driver_id', 'lap', 'position', 'time', 'milliseconds')
+POSITION_COLUMNS = ('session_id', 'driver_id', 'time', 'session_time', 'x', 'y', 'z')
+
+
+@lru_cache(maxsize=32)
+def _insert_sql(table: str, columns: Tuple[str, ...], row_count: int) -> str:
+    """Build an INSERT OR IGNORE statement for row_count rows."""
+    row = f"({', '.join('?' * len(columns))})"
+    return (
+        f"INSERT OR IGNORE INTO {table} ({', '.join(columns)}) "
+        f"VALUES {', '.join([row] * row_count)}"
+    )
+
+
+def _sqlite_timestamp(text: Any) -> Optional[str]:
+    """
+    Rewrite an ISO 8601 timestamp as the text sqlite3 stores for a datetime.
+    
+    Gives exactly str(datetime.fromisoformat(text)), the form the sqlite3
+    datetime adapter writes ("YYYY-MM-DD HH:MM:SS[.ffffff][+HH:MM]"), so
+    rows compare and sort consistently as TEXT, without building a datetime.
+    Field ranges (e.g. month 13) are not checked.
+    
+    Args:
+        text: Timestamp string
+        
+    Returns:
+        Timestamp text, or None if text is not an ISO 8601 date or timestamp
+    """
+    if not isinstance(text, str):
+        return None
+    match = ISO_TIMESTAMP_RE.match(text)
+    if match is None:
+        return None
+    
+    date, time, fraction, offset = match.groups()
+    timestamp = f"{date} {time or '00:00:00'}"
+    # Microseconds, padded to 6 digits; omitted when zero, as isoformat does
+    if fraction and int(fraction[:6]):
+        timestamp += '.' + fraction[:6].ljust(6, '0')
+    if offset:
+        timestamp += '+00:00' if offset in ('Z', '-00:00') else offset
+    return timestamp
+
+
+def _lap_time_ms(lap_time: Any) -> Optional[int]:
+    """Convert an "M:SS.mmm" lap time to milliseconds (None if not in that form)."""
+    if not lap_time:
+        return None
+    try:
+        parts = lap_time.split(':')
+        if len(parts) == 2:
+            minutes, seconds = parts
+            return int(float(minutes) * 60000 + float(seconds) * 1000)
+    except (AttributeError, ValueError):
+        pass
+    return None
+
 
 class DatabaseInserter:
     """Handles database insertions for F1 dataset."""
@@ -26,13 +106,148 @@ class DatabaseInserter:
         self.db_path = db_path
         self.logger = logger
         self.batch_size = 1000
+        # driver number -> driver_id, reloaded at the start of each insert
+        self._driver_cache: Dict[int, int] = {}
+        # season_id -> highest race round, reloaded by insert_sessions
+        self._max_round: Dict[int, int] = {}
+        
+    def _get_connection(self, bulk: bool = False) -> sqlite3.Connection:
+        """
+        Get database connection.
         
-    def _get_connection(self) -> sqlite3.Connection:
-        """Get database connection."""
-        conn = sqlite3.connect(self.db_path)
-        conn.execute("PRAGMA foreign_keys = ON")
+        Args:
+            bulk: Skip per-row foreign key enforcement. Bulk inserts take
+                their parent ids from the database itself; run
+                DataValidator.validate_foreign_keys after the ingest to
+                check the result in one pass.
+        """
+        # Autocommit mode: the sqlite3 module opens no implicit transactions,
+        # so the insert methods delimit their own with BEGIN/COMMIT
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        conn.execute(f"PRAGMA foreign_keys = {'OFF' if bulk else 'ON'}")
+        # WAL with synchronous=NORMAL syncs at checkpoints rather than on
+        # every commit, and stays consistent after a crash
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        conn.execute("PRAGMA cache_size = -131072")  # 128 MiB
         return conn
     
+    @contextmanager
+    def _transaction(self, bulk: bool = False) -> Iterator[sqlite3.Cursor]:
+        """
+        Run a block in one write transaction on its own connection.
+        
+        The write lock is taken up front (BEGIN IMMEDIATE). The transaction
+        commits when the block completes and rolls back if it raises; the
+        connection is closed either way, so no lock outlives the block.
+        
+        Args:
+            bulk: Passed to _get_connection
+            
+        Yields:
+            Cursor inside the open transaction
+        """
+        conn = self._get_connection(bulk=bulk)
+        try:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                yield cursor
+            except BaseException:
+                conn.rollback()
+                raise
+            cursor.execute("COMMIT")
+        finally:
+            conn.close()
+    
+    @contextmanager
+    def bulk_mode(self) -> Iterator[None]:
+        """
+        Defer secondary index maintenance on the BULK_TABLES.
+        
+        Their secondary indexes are dropped on entry and rebuilt on exit,
+        so a large ingest builds each index once from sorted data instead
+        of updating it row by row. Indexes backing PRIMARY KEY and UNIQUE
+        constraints are kept, as INSERT OR IGNORE depends on them.
+        
+        Wrap only the insert calls: the indexes are missing for as long as
+        the block runs. The rebuild is idempotent (CREATE INDEX IF NOT
+        EXISTS), and re-applying schema/schema.sql restores any index a
+        failed rebuild left missing.
+        """
+        conn = self._get_connection()
+        try:
+            placeholders = ', '.join('?' * len(BULK_TABLES))
+            # Constraint indexes have no SQL of their own
+            indexes = conn.execute(f"""
+                SELECT name, sql FROM sqlite_master
+                WHERE type = 'index' AND tbl_name IN ({placeholders}) AND sql IS NOT NULL
+            """, BULK_TABLES).fetchall()
+            
+            conn.execute("BEGIN IMMEDIATE")
+            for name, _ in indexes:
+                conn.execute(f'DROP INDEX IF EXISTS "{name}"')
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        self.logger.info(f"Bulk mode: dropped {len(indexes)} indexes")
+        
+        try:
+            yield
+        finally:
+            # The insert methods have closed their connections by now, so
+            # nothing else holds the write lock
+            try:
+                with self._transaction() as cursor:
+                    for _, sql in indexes:
+                        cursor.execute(CREATE_INDEX_RE.sub(r'\g<0> IF NOT EXISTS', sql, count=1))
+            except sqlite3.Error as e:
+                self.logger.error(
+                    f"Bulk mode: could not rebuild indexes ({e}); "
+                    f"re-apply schema/schema.sql to restore them"
+                )
+                raise
+            self.logger.info(f"Bulk mode: rebuilt {len(indexes)} indexes")
+    
+    def _insert_rows(
+        self,
+        cursor: sqlite3.Cursor,
+        table: str,
+        columns: Tuple[str, ...],
+        rows: Sequence[Tuple]
+    ) -> int:
+        """
+        Insert rows, many per statement.
+        
+        A multi-row VALUES list runs as one statement where executemany
+        runs one per row.
+        
+        Args:
+            cursor: Database cursor
+            table: Table name
+            columns: Column names, matching the order of each row
+            rows: Row tuples
+            
+        Returns:
+            Number of rows inserted (existing rows are ignored)
+        """
+        chunk_size = max(1, min(self.batch_size, SQLITE_MAX_VARIABLES // len(columns)))
+        inserted = 0
+        
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            try:
+                cursor.execute(
+                    _insert_sql(table, columns, len(chunk)),
+                    list(chain.from_iterable(chunk))
+                )
+                inserted += cursor.rowcount
+            except sqlite3.Error as e:
+                self.logger.warning(f"Error inserting into {table}: {e}")
+        
+        return inserted
+    
     def _get_or_create_race(self, cursor: sqlite3.Cursor, year: int, circuit_name: str, session_key: int) -> Optional[int]:
         """Get or create a race for the session."""
         # Ensure year is an integer
@@ -43,15 +258,24 @@ class DatabaseInserter:
                 year = 2023  # Default fallback
         
         # First, get or create season
-        cursor.execute("SELECT season_id FROM seasons WHERE year = ?", (year,))
-        season_row = cursor.fetchone()
-        if not season_row:
+        if SQLITE_HAS_RETURNING:
+            # No-op update on conflict so RETURNING also yields existing rows
+            cursor.execute("""
+                INSERT INTO seasons (year) VALUES (?)
+                ON CONFLICT(year) DO UPDATE SET year = excluded.year
+                RETURNING season_id
+            """, (year,))
+            season_id = cursor.fetchone()[0]
+        else:
+            cursor.execute("SELECT season_id FROM seasons WHERE year = ?", (year,))
+            season_row = cursor.fetchone()
+            season_id = season_row[0] if season_row else None
+        
+        if not season_id:
             cursor.execute("INSERT OR IGNORE INTO seasons (year) VALUES (?)", (year,))
             cursor.execute("SELECT season_id FROM seasons WHERE year = ?", (year,))
             season_row = cursor.fetchone()
             season_id = season_row[0] if season_row else None
-        else:
-            season_id = season_row[0]
         
         if not season_id:
             return None
@@ -59,7 +283,15 @@ class DatabaseInserter:
         # Get or create circuit
         cursor.execute("SELECT circuit_id FROM circuits WHERE name LIKE ?", (f"%{circuit_name}%",))
         circuit_row = cursor.fetchone()
-        if not circuit_row:
+        if not circuit_row and SQLITE_HAS_RETURNING:
+            cursor.execute("""
+                INSERT INTO circuits (circuit_ref, name, location, country)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(circuit_ref) DO UPDATE SET circuit_ref = excluded.circuit_ref
+                RETURNING circuit_id
+            """, (circuit_name.lower().replace(' ', '_'), circuit_name, circuit_name, None))
+            circuit_id = cursor.fetchone()[0]
+        elif not circuit_row:
             cursor.execute("""
                 INSERT OR IGNORE INTO circuits (circuit_ref, name, location, country)
                 VALUES (?, ?, ?, ?)
@@ -86,12 +318,8 @@ class DatabaseInserter:
             return race_row[0]
         
         # No existing race found, create a new one
-        # Find the next available round number for this season
-        cursor.execute("""
-            SELECT MAX(round) FROM races WHERE season_id = ?
-        """, (season_id,))
-        max_round_row = cursor.fetchone()
-        next_round = (max_round_row[0] + 1) if max_round_row and max_round_row[0] is not None else 1
+        # Next available round number for this season
+        next_round = self._max_round.get(season_id, 0) + 1
         
         # Ensure round number is within valid range (1-100)
         if next_round > 100:
@@ -118,6 +346,7 @@ class DatabaseInserter:
                 VALUES (?, ?, ?, ?, ?, ?)
             """, (season_id, next_round, circuit_id, f"{circuit_name} {year}", f"{year}-01-01", f"{year}-01-01"))
             race_id = cursor.lastrowid
+            self._max_round[season_id] = max(self._max_round.get(season_id, 0), next_round)
         except sqlite3.IntegrityError:
             # UNIQUE constraint failed, try to get existing race
             cursor.execute("""
@@ -142,98 +371,109 @@ class DatabaseInserter:
         if not sessions:
             return {}
         
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        session_map = {}  # session_key -> session_id
-        
-        for session in sessions:
-            try:
-                session_key = session.get('session_key')
-                if not session_key:
-                    continue
-                
-                # Get or create race
-                year = session.get('year') or 2023
-                # Ensure year is an integer
-                if not isinstance(year, int):
-                    try:
-                        year = int(year)
-                    except (ValueError, TypeError):
-                        year = 2023
-                
-                circuit_name = session.get('circuit_short_name') or session.get('location') or 'Unknown'
-                race_id = self._get_or_create_race(cursor, year, circuit_name, session_key)
-                
-                if not race_id:
-                    continue
-                
-                # Parse date - ensure session_date_str is always a valid string
-                date_start = session.get('date_start')
-                session_date_str = f"{year}-01-01"  # Default fallback
-                session_time_str = None
-                if date_start:
-                    try:
-                        from datetime import datetime
-                        # Handle ISO format with or without timezone
-                        date_str = date_start.replace('Z', '+00:00') if 'Z' in date_start else date_start
-                        dt = datetime.fromisoformat(date_str)
-                        session_date_str = dt.strftime('%Y-%m-%d')
-                        session_time_str = dt.strftime('%H:%M:%S')
-                    except Exception as e:
-                        self.logger.debug(f"Could not parse date {date_start}: {e}")
-                        # Keep default session_date_str
-                
-                # Ensure session_date_str is never None or empty
-                if not session_date_str or not isinstance(session_date_str, str):
-                    session_date_str = f"{year}-01-01"
-                
-                session_type = session.get('session_name', 'Race')
-                session_name = session.get('session_name', 'Race')
-                
-                # Insert or update session
-                cursor.execute("""
-                    INSERT OR IGNORE INTO sessions (
-                        race_id, session_type, session_name, date, time, openf1_session_key
-                    ) VALUES (?, ?, ?, ?, ?, ?)
-                """, (
-                    race_id,
-                    session_type,
-                    session_name,
-                    session_date_str,
-                    session_time_str,
-                    session_key
-                ))
-                
-                if cursor.rowcount > 0:
-                    session_id = cursor.lastrowid
-                else:
-                    # Get existing session_id
+        with self._transaction(bulk=True) as cursor:
+            session_map = {}  # session_key -> session_id
+            race_ids = {}  # (year, circuit name) -> race_id; sessions share races
+            
+            cursor.execute("SELECT season_id, MAX(round) FROM races GROUP BY season_id")
+            self._max_round = dict(cursor.fetchall())
+            
+            for session in sessions:
+                try:
+                    session_key = session.get('session_key')
+                    if not session_key:
+                        continue
+                    
+                    # Get or create race
+                    year = session.get('year') or 2023
+                    # Ensure year is an integer
+                    if not isinstance(year, int):
+                        try:
+                            year = int(year)
+                        except (ValueError, TypeError):
+                            year = 2023
+                    
+                    circuit_name = session.get('circuit_short_name') or session.get('location') or 'Unknown'
+                    race_id = race_ids.get((year, circuit_name))
+                    if race_id is None:
+                        race_id = self._get_or_create_race(cursor, year, circuit_name, session_key)
+                        race_ids[(year, circuit_name)] = race_id
+                    
+                    if not race_id:
+                        continue
+                    
+                    # Parse date - ensure session_date_str is always a valid string
+                    date_start = session.get('date_start')
+                    session_date_str = f"{year}-01-01"  # Default fallback
+                    session_time_str = None
+                    if date_start:
+                        try:
+                            from datetime import datetime
+                            # Handle ISO format with or without timezone
+                            date_str = date_start.replace('Z', '+00:00') if 'Z' in date_start else date_start
+                            dt = datetime.fromisoformat(date_str)
+                            session_date_str = dt.strftime('%Y-%m-%d')
+                            session_time_str = dt.strftime('%H:%M:%S')
+                        except Exception as e:
+                            self.logger.debug(f"Could not parse date {date_start}: {e}")
+                            # Keep default session_date_str
+                    
+                    # Ensure session_date_str is never None or empty
+                    if not session_date_str or not isinstance(session_date_str, str):
+                        session_date_str = f"{year}-01-01"
+                    
+                    session_type = session.get('session_name', 'Race')
+                    session_name = session.get('session_name', 'Race')
+                    
+                    # Insert or update session
                     cursor.execute("""
-                        SELECT session_id FROM sessions WHERE openf1_session_key = ?
-                    """, (session_key,))
-                    row = cursor.fetchone()
-                    session_id = row[0] if row else None
-                
-                if session_id:
-                    session_map[session_key] = session_id
+                        INSERT OR IGNORE INTO sessions (
+                            race_id, session_type, session_name, date, time, openf1_session_key
+                        ) VALUES (?, ?, ?, ?, ?, ?)
+                    """, (
+                        race_id,
+                        session_type,
+                        session_name,
+                        session_date_str,
+                        session_time_str,
+                        session_key
+                    ))
                     
-            except sqlite3.Error as e:
-                self.logger.warning(f"Error inserting session {session.get('session_key')}: {e}")
-        
-        conn.commit()
-        conn.close()
+                    if cursor.rowcount > 0:
+                        session_id = cursor.lastrowid
+                    else:
+                        # Get existing session_id
+                        cursor.execute("""
+                            SELECT session_id FROM sessions WHERE openf1_session_key = ?
+                        """, (session_key,))
+                        row = cursor.fetchone()
+                        session_id = row[0] if row else None
+                    
+                    if session_id:
+                        session_map[session_key] = session_id
+                        
+                except sqlite3.Error as e:
+                    self.logger.warning(f"Error inserting session {session.get('session_key')}: {e}")
         
         self.logger.info(f"Inserted/updated {len(session_map)} sessions")
         return session_map
     
+    def _load_driver_cache(self, cursor: sqlite3.Cursor):
+        """Load the driver number -> driver_id map from the database."""
+        # Descending, so a number shared by several drivers keeps the
+        # lowest driver_id, as a lookup by number would return
+        cursor.execute("""
+            SELECT number, driver_id FROM drivers
+            WHERE number IS NOT NULL
+            ORDER BY driver_id DESC
+        """)
+        self._driver_cache = dict(cursor.fetchall())
+    
     def _get_or_create_driver(self, cursor: sqlite3.Cursor, driver_number: int) -> Optional[int]:
         """Get or create a driver by driver number."""
-        # Check if driver exists by number
-        cursor.execute("SELECT driver_id FROM drivers WHERE number = ?", (driver_number,))
-        row = cursor.fetchone()
-        if row:
-            return row[0]
+        driver_id = self._driver_cache.get(driver_number)
+        if driver_id:
+            return driver_id
         
         # Create placeholder driver
         cursor.execute("""
@@ -246,6 +486,7 @@ class DatabaseInserter:
             str(driver_number),
             f"Driver {driver_number}"
         ))
+        self._driver_cache[driver_number] = cursor.lastrowid
         return cursor.lastrowid
     
     def insert_lap_times(self, laps: List[Dict], session_id: int) -> int:
@@ -262,81 +503,45 @@ class DatabaseInserter:
         if not laps:
             return 0
         
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        # Get race_id from session
-        cursor.execute("SELECT race_id FROM sessions WHERE session_id = ?", (session_id,))
-        session_row = cursor.fetchone()
-        if not session_row:
-            self.logger.warning(f"Session {session_id} not found, skipping lap times")
-            conn.close()
-            return 0
-        
-        race_id = session_row[0]
-        
-        inserted = 0
-        batch = []
-        
-        for lap in laps:
-            try:
-                driver_number = lap.get('driver_number')
+        with self._transaction(bulk=True) as cursor:
+            # Get race_id from session
+            cursor.execute("SELECT race_id FROM sessions WHERE session_id = ?", (session_id,))
+            session_row = cursor.fetchone()
+            if not session_row:
+                self.logger.warning(f"Session {session_id} not found, skipping lap times")
+                return 0
+            
+            race_id = session_row[0]
+            self._load_driver_cache(cursor)
+            
+            # Resolve each distinct driver once, in order of first appearance
+            driver_ids = {}
+            for driver_number in dict.fromkeys(lap.get('driver_number') for lap in laps):
                 if not driver_number:
                     continue
-                
-                # Get or create driver
-                driver_id = self._get_or_create_driver(cursor, driver_number)
-                if not driver_id:
-                    continue
-                
+                try:
+                    driver_ids[driver_number] = self._get_or_create_driver(cursor, driver_number)
+                except sqlite3.Error as e:
+                    self.logger.warning(f"Error inserting driver {driver_number}: {e}")
+            
+            rows = []
+            for lap in laps:
+                driver_id = driver_ids.get(lap.get('driver_number'))
                 lap_number = lap.get('lap_number')
-                if not lap_number:
+                if not driver_id or not lap_number:
                     continue
                 
                 lap_time = lap.get('lap_time')
-                milliseconds = None
-                if lap_time:
-                    try:
-                        # Convert time string to milliseconds
-                        parts = lap_time.split(':')
-                        if len(parts) == 2:
-                            minutes, seconds = parts
-                            milliseconds = int(float(minutes) * 60000 + float(seconds) * 1000)
-                    except:
-                        pass
-                
-                batch.append((
+                rows.append((
                     race_id,
                     driver_id,
                     lap_number,
                     lap.get('position'),
                     lap_time,
-                    milliseconds
+                    _lap_time_ms(lap_time)
                 ))
-                
-                if len(batch) >= self.batch_size:
-                    cursor.executemany("""
-                        INSERT OR IGNORE INTO lap_times (
-                            race_id, driver_id, lap, position, time, milliseconds
-                        ) VALUES (?, ?, ?, ?, ?, ?)
-                    """, batch)
-                    inserted += cursor.rowcount
-                    batch = []
-                    conn.commit()
-            except sqlite3.Error as e:
-                self.logger.warning(f"Error inserting lap: {e}")
-        
-        # Insert remaining batch
-        if batch:
-            cursor.executemany("""
-                INSERT OR IGNORE INTO lap_times (
-                    race_id, driver_id, lap, position, time, milliseconds
-                ) VALUES (?, ?, ?, ?, ?, ?)
-            """, batch)
-            inserted += cursor.rowcount
-            conn.commit()
-        
-        conn.close()
+            
+            inserted = self._insert_rows(cursor, 'lap_times', LAP_TIME_COLUMNS, rows)
         
         self.logger.info(f"Inserted {inserted} lap times for session {session_id}")
         return inserted
@@ -355,77 +560,56 @@ class DatabaseInserter:
         if not positions:
             return 0
         
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        # Verify session exists
-        cursor.execute("SELECT session_id FROM sessions WHERE session_id = ?", (session_id,))
-        if not cursor.fetchone():
-            self.logger.warning(f"Session {session_id} not found, skipping position data")
-            conn.close()
-            return 0
-        
-        inserted = 0
-        batch = []
-        
-        for pos in positions:
-            try:
-                driver_number = pos.get('driver_number')
-                if not driver_number:
-                    continue
-                
-                # Get or create driver
-                driver_id = self._get_or_create_driver(cursor, driver_number)
-                if not driver_id:
-                    continue
-                
-                timestamp = pos.get('date')
-                if not timestamp:
-                    continue
-                
-                # Parse timestamp
+        with self._transaction(bulk=True) as cursor:
+            # Verify session exists
+            cursor.execute("SELECT session_id FROM sessions WHERE session_id = ?", (session_id,))
+            if not cursor.fetchone():
+                self.logger.warning(f"Session {session_id} not found, skipping position data")
+                return 0
+            
+            self._load_driver_cache(cursor)
+            inserted = 0
+            batch = []
+            
+            for pos in positions:
                 try:
-                    from datetime import datetime
-                    if 'T' in timestamp:
-                        dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-                    else:
-                        dt = datetime.fromisoformat(timestamp)
-                except:
-                    continue
-                
-                batch.append((
-                    session_id,
-                    driver_id,
-                    dt,
-                    None,  # session_time (not in OpenF1 position data)
-                    None,  # x
-                    None,  # y
-                    None   # z
-                ))
-                
-                if len(batch) >= self.batch_size:
-                    cursor.executemany("""
-                        INSERT OR IGNORE INTO telemetry_position (
-                            session_id, driver_id, time, session_time, x, y, z
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?)
-                    """, batch)
-                    inserted += cursor.rowcount
-                    batch = []
-                    conn.commit()
-            except sqlite3.Error as e:
-                self.logger.warning(f"Error inserting position: {e}")
-        
-        # Insert remaining batch
-        if batch:
-            cursor.executemany("""
-                INSERT OR IGNORE INTO telemetry_position (
-                    session_id, driver_id, time, session_time, x, y, z
-                ) VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, batch)
-            inserted += cursor.rowcount
-            conn.commit()
-        
-        conn.close()
+                    driver_number = pos.get('driver_number')
+                    if not driver_number:
+                        continue
+                    
+                    # Get or create driver
+                    driver_id = self._get_or_create_driver(cursor, driver_number)
+                    if not driver_id:
+                        continue
+                    
+                    timestamp = pos.get('date')
+                    if not timestamp:
+                        continue
+                    
+                    # Rewritten as text directly, not parsed into a datetime
+                    timestamp = _sqlite_timestamp(timestamp)
+                    if timestamp is None:
+                        continue
+                    
+                    batch.append((
+                        session_id,
+                        driver_id,
+                        timestamp,
+                        None,  # session_time (not in OpenF1 position data)
+                        None,  # x
+                        None,  # y
+                        None   # z
+                    ))
+                    
+                    if len(batch) >= self.batch_size:
+                        inserted += self._insert_rows(cursor, 'telemetry_position', POSITION_COLUMNS, batch)
+                        batch = []
+                except sqlite3.Error as e:
+                    self.logger.warning(f"Error inserting position: {e}")
+            
+            # Insert remaining batch
+            if batch:
+                inserted += self._insert_rows(cursor, 'telemetry_position', POSITION_COLUMNS, batch)
         
         self.logger.info(f"Inserted {inserted} position records for session {session_id}")
         return inserted
@@ -196,24 +196,24 @@ class DriverMatcher:
         self.logger.info("Creating unified driver list...")
         
         unified_drivers = []
+        by_id = {}  # driver_id -> unified driver (same objects as in the list)
         driver_id_counter = 1
         
         # Process drivers from each source
         for source, drivers in drivers_by_source.items():
+            id_key = f'{source}_id'
             for driver in drivers:
                 # Try to match with existing unified drivers
                 matched_id = self.match_driver(driver, source, unified_drivers)
                 
                 if matched_id:
                     # Update existing driver with cross-source IDs
-                    for unified in unified_drivers:
-                        if unified['driver_id'] == matched_id:
-                            # Add source-specific ID
-                            unified[f'{source}_id'] = driver.get('id') or driver.get('driver_id')
-                            # Update name if more complete
-                            if not unified.get('full_name') and driver.get('name'):
-                                unified['full_name'] = driver.get('name')
-                            break
+                    unified = by_id[matched_id]
+                    # Add source-specific ID
+                    unified[id_key] = driver.get('id') or driver.get('driver_id')
+                    # Update name if more complete
+                    if not unified.get('full_name') and driver.get('name'):
+                        unified['full_name'] = driver.get('name')
                 else:
                     # Create new unified driver
                     driver_name = driver.get('name') or driver.get('full_name') or ''
@@ -229,10 +229,11 @@ class DriverMatcher:
                         'number': driver.get('number') or driver.get('driver_number'),
                         'nationality': driver.get('nationality'),
                         'date_of_birth': driver.get('date_of_birth') or driver.get('dob'),
-                        f'{source}_id': driver.get('id') or driver.get('driver_id')
+                        id_key: driver.get('id') or driver.get('driver_id')
                     }
                     
                     unified_drivers.append(unified_driver)
+                    by_id[driver_id_counter] = unified_driver
                     driver_id_counter += 1
         
         self.logger.info(f"Created {len(unified_drivers)} unified drivers")
@@ -135,11 +135,15 @@ class F1DatasetBuilder:
         total_laps = 0
         total_positions = 0
         
+        # Fetch everything first, keeping only what gets inserted, so the
+        # telemetry indexes are down for the inserts alone, not the downloads
+        telemetry_by_session = {}
+        
         for session in sessions:
             session_key = session.get('session_key')
             if not session_key:
                 continue
-                
+            
             session_id = session_map.get(session_key)
             if not session_id:
                 self.logger.warning(f"Session {session_key} not found in database, skipping")
@@ -149,9 +153,15 @@ class F1DatasetBuilder:
             
             # Fetch complete telemetry
             telemetry = self.openf1_fetcher.fetch_session_telemetry(session_key)
-            
-            # Insert telemetry into database
             if telemetry:
+                telemetry_by_session[session_id] = {
+                    'laps': telemetry.get('laps'),
+                    'position': telemetry.get('position')
+                }
+        
+        # Insert telemetry into database, rebuilding the indexes once at the end
+        with self.inserter.bulk_mode():
+            for session_id, telemetry in telemetry_by_session.items():
                 results = self.inserter.insert_openf1_telemetry(telemetry, session_id)
                 total_laps += results.get('lap_times', 0)
                 total_positions += results.get('positions', 0)
@@ -227,6 +237,7 @@ class F1DatasetBuilder:
         self.logger.info("Validating dataset...")
         
         report = self.validator.generate_quality_report()
+        self.validator.close()
         
         # Print summary (will be enhanced by UI if available)
         try:
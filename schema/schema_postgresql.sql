@@ -400,6 +400,7 @@ CREATE INDEX IF NOT EXISTS idx_race_results_driver ON race_results(driver_id);
 CREATE INDEX IF NOT EXISTS idx_race_results_position ON race_results(race_id, position);
 CREATE INDEX IF NOT EXISTS idx_lap_times_race_driver ON lap_times(race_id, driver_id);
 CREATE INDEX IF NOT EXISTS idx_lap_times_lap ON lap_times(race_id, lap);
+CREATE INDEX IF NOT EXISTS idx_lap_times_milliseconds ON lap_times(milliseconds);
 CREATE INDEX IF NOT EXISTS idx_sector_times_race_driver_lap ON sector_times(race_id, driver_id, lap);
 CREATE INDEX IF NOT EXISTS idx_pit_stops_race_driver ON pit_stops(race_id, driver_id);
 CREATE INDEX IF NOT EXISTS idx_telemetry_session_driver ON telemetry(session_id, driver_id);
@@ -3,6 +3,9 @@
 from utils.logger import get_logger, F1DatasetLogger
 from utils.rate_limiter import get_rate_limiter, RateLimiter, APIRateLimiter
 from utils.cache_manager import get_cache_manager, CacheManager
+from utils.http_session import create_session, decode_json, DEFAULT_TIMEOUT
+from utils.config_loader import load_config
+from utils.request_coalescer import RequestCoalescer
 
 __all__ = [
     'get_logger',
@@ -12,5 +15,10 @@ __all__ = [
     'APIRateLimiter',
     'get_cache_manager',
     'CacheManager',
+    'create_session',
+    'decode_json',
+    'DEFAULT_TIMEOUT',
+    'load_config',
+    'RequestCoalescer',
 ]
 
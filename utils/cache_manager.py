@@ -6,6 +6,9 @@ Stores API responses locally to avoid redundant requests and enable offline proc
 import json
 import hashlib
 import pickle
+import threading
+import zlib
+from collections import OrderedDict
 from pathlib import Path
 from typing import Any, Optional, Dict
 from datetime import datetime, timedelta
@@ -13,6 +16,9 @@ from utils.logger import get_logger
 
 logger = get_logger()
 
+# Stored in place of a response body for requests known to have no data
+MISS_MARKER = {'__miss__': True}
+
 
 class CacheManager:
     """Manages local caching of API responses."""
@@ -21,7 +27,9 @@ class CacheManager:
         self,
         cache_dir: str = "cache",
         default_ttl: int = 86400,  # 24 hours in seconds
-        use_pickle: bool = True
+        use_pickle: bool = True,
+        memory_entries: int = 2048,
+        compress_level: int = 1
     ):
         """
         Initialize cache manager.
@@ -30,13 +38,25 @@ class CacheManager:
             cache_dir: Directory for cache files
             default_ttl: Default time-to-live in seconds
             use_pickle: Whether to use pickle for complex objects (faster) or JSON (portable)
+            memory_entries: Number of entries kept in memory in front of the disk cache (0 = disabled)
+            compress_level: zlib level for pickle cache files (0 = uncompressed). API
+                responses shrink several-fold, and reading fewer bytes outweighs the
+                decompression cost at low levels
         """
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         self.default_ttl = default_ttl
         self.use_pickle = use_pickle
+        self.compress_level = compress_level
         self.metadata_file = self.cache_dir / "cache_metadata.json"
         self.metadata = self._load_metadata()
+        # Fetchers may share this instance across worker threads
+        self._lock = threading.RLock()
+        
+        # In-memory LRU of recently used entries, held as pickled bytes so
+        # every hit returns a fresh copy (disk remains the source of truth)
+        self.memory_entries = memory_entries
+        self._memory: OrderedDict = OrderedDict()
     
     def _load_metadata(self) -> Dict:
         """Load cache metadata."""
@@ -51,7 +71,7 @@ class CacheManager:
     def _save_metadata(self):
         """Save cache metadata."""
         try:
-            with open(self.metadata_file, 'w') as f:
+            with self._lock, open(self.metadata_file, 'w') as f:
                 json.dump(self.metadata, f, indent=2)
         except Exception as e:
             logger.warning(f"Failed to save cache metadata: {e}")
@@ -69,19 +89,77 @@ class CacheManager:
         """
         key_string = url
         if params:
-            # Sort params for consistent hashing
-            sorted_params = sorted(params.items())
-            key_string += json.dumps(sorted_params, sort_keys=True)
+            # Key on the query string requests would send: values as strings
+            # (so 2024 and '2024' share an entry), None-valued params dropped,
+            # sorted for consistent hashing
+            sorted_params = sorted(
+                (str(k), str(v)) for k, v in params.items() if v is not None
+            )
+            if sorted_params:
+                key_string += json.dumps(sorted_params)
         
         return hashlib.md5(key_string.encode()).hexdigest()
     
+    def _remember(self, cache_key: str, payload: bytes):
+        """Store a pickled entry in the in-memory LRU, evicting the oldest entry if full."""
+        if self.memory_entries <= 0:
+            return
+        
+        with self._lock:
+            self._memory[cache_key] = payload
+            self._memory.move_to_end(cache_key)
+            if len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+    
     def _get_cache_path(self, cache_key: str) -> Path:
         """Get file path for cache key."""
         if self.use_pickle:
+            if self.compress_level:
+                return self.cache_dir / f"{cache_key}.pkl.z"
             return self.cache_dir / f"{cache_key}.pkl"
         else:
             return self.cache_dir / f"{cache_key}.json"
     
+    def _get_legacy_cache_path(self, cache_key: str) -> Optional[Path]:
+        """
+        Get the uncompressed pickle path written before compression was enabled.
+        
+        Args:
+            cache_key: Cache key
+            
+        Returns:
+            Legacy file path, or None if entries are not stored compressed
+        """
+        if self.use_pickle and self.compress_level:
+            return self.cache_dir / f"{cache_key}.pkl"
+        return None
+    
+    def _migrate_legacy_entry(self, cache_key: str, cache_path: Path) -> Optional[bytes]:
+        """
+        Rewrite an uncompressed legacy pickle file in the compressed format.
+        
+        Args:
+            cache_key: Cache key
+            cache_path: Compressed path the entry is moved to
+            
+        Returns:
+            Pickled payload, or None if there is no legacy file
+        """
+        legacy_path = self._get_legacy_cache_path(cache_key)
+        if legacy_path is None:
+            return None
+        
+        # Serialized so concurrent readers do not race on the rename
+        with self._lock:
+            if not legacy_path.exists():
+                return None
+            with open(legacy_path, 'rb') as f:
+                payload = f.read()
+            with open(cache_path, 'wb') as f:
+                f.write(zlib.compress(payload, self.compress_level))
+            legacy_path.unlink()
+        return payload
+    
     def get(
         self,
         url: str,
@@ -91,6 +169,9 @@ class CacheManager:
         """
         Get cached response if available and not expired.
         
+        Recently used entries are served from memory without touching
+        disk. Every call returns a new object, so callers may mutate it.
+        
         Args:
             url: API URL
             params: Request parameters
@@ -100,29 +181,51 @@ class CacheManager:
             Cached data or None if not found/expired
         """
         cache_key = self._get_cache_key(url, params)
-        cache_path = self._get_cache_path(cache_key)
-        
-        if not cache_path.exists():
-            return None
         
         # Check metadata for expiration
-        if cache_key in self.metadata:
-            cached_time = datetime.fromisoformat(self.metadata[cache_key]['timestamp'])
-            ttl_seconds = ttl or self.metadata[cache_key].get('ttl', self.default_ttl)
+        entry = self.metadata.get(cache_key)
+        if entry is not None:
+            cached_time = datetime.fromisoformat(entry['timestamp'])
+            ttl_seconds = ttl or entry.get('ttl', self.default_ttl)
             
             if datetime.now() - cached_time > timedelta(seconds=ttl_seconds):
                 logger.debug(f"Cache expired for {url}")
                 self.delete(url, params)
                 return None
         
+        # Check in-memory tier
+        with self._lock:
+            payload = self._memory.get(cache_key)
+            if payload is not None:
+                self._memory.move_to_end(cache_key)
+        if payload is not None:
+            return pickle.loads(payload)
+        
+        cache_path = self._get_cache_path(cache_key)
+        
         # Load cached data
         try:
             if self.use_pickle:
-                with open(cache_path, 'rb') as f:
-                    return pickle.load(f)
+                if cache_path.exists():
+                    with open(cache_path, 'rb') as f:
+                        payload = f.read()
+                    if self.compress_level:
+                        payload = zlib.decompress(payload)
+                else:
+                    # Entries cached before compression was enabled
+                    payload = self._migrate_legacy_entry(cache_key, cache_path)
+                    if payload is None:
+                        return None
+                data = pickle.loads(payload)
             else:
+                if not cache_path.exists():
+                    return None
                 with open(cache_path, 'r') as f:
-                    return json.load(f)
+                    data = json.load(f)
+                payload = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+            
+            self._remember(cache_key, payload)
+            return data
         except Exception as e:
             logger.warning(f"Failed to load cache for {url}: {e}")
             return None
@@ -147,26 +250,73 @@ class CacheManager:
         cache_path = self._get_cache_path(cache_key)
         
         try:
+            # Also the in-memory snapshot, so later changes the caller makes
+            # to data do not reach the cache
+            payload = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
             if self.use_pickle:
                 with open(cache_path, 'wb') as f:
-                    pickle.dump(data, f)
+                    if self.compress_level:
+                        f.write(zlib.compress(payload, self.compress_level))
+                    else:
+                        f.write(payload)
+                # Drop a superseded uncompressed copy
+                legacy_path = self._get_legacy_cache_path(cache_key)
+                if legacy_path is not None and legacy_path.exists():
+                    legacy_path.unlink()
             else:
                 with open(cache_path, 'w') as f:
                     json.dump(data, f, indent=2)
             
             # Update metadata
-            self.metadata[cache_key] = {
-                'url': url,
-                'params': params,
-                'timestamp': datetime.now().isoformat(),
-                'ttl': ttl or self.default_ttl
-            }
-            self._save_metadata()
+            with self._lock:
+                self.metadata[cache_key] = {
+                    'url': url,
+                    'params': params,
+                    'timestamp': datetime.now().isoformat(),
+                    'ttl': ttl or self.default_ttl
+                }
+                self._save_metadata()
             
+            self._remember(cache_key, payload)
             logger.debug(f"Cached response for {url}")
         except Exception as e:
             logger.warning(f"Failed to cache response for {url}: {e}")
     
+    def set_miss(
+        self,
+        url: str,
+        params: Optional[Dict] = None,
+        ttl: Optional[int] = None
+    ):
+        """
+        Record that a request has no data (e.g. returned 404).
+        
+        Args:
+            url: API URL
+            params: Request parameters
+            ttl: Time-to-live override
+        """
+        self.set(url, MISS_MARKER, params, ttl)
+    
+    @staticmethod
+    def is_miss(data: Any) -> bool:
+        """
+        Check whether cached data is a negative-result marker.
+        
+        Args:
+            data: Data returned by get()
+            
+        Returns:
+            True if the entry was stored with set_miss()
+        """
+        return isinstance(data, dict) and data.get('__miss__') is True
+    
+    def _unlink_entry(self, cache_key: str):
+        """Remove an entry's cache file, including any legacy uncompressed copy."""
+        for cache_path in (self._get_cache_path(cache_key), self._get_legacy_cache_path(cache_key)):
+            if cache_path is not None and cache_path.exists():
+                cache_path.unlink()
+    
     def delete(self, url: str, params: Optional[Dict] = None):
         """
         Delete cached response.
@@ -176,14 +326,13 @@ class CacheManager:
             params: Request parameters
         """
         cache_key = self._get_cache_key(url, params)
-        cache_path = self._get_cache_path(cache_key)
-        
-        if cache_path.exists():
-            cache_path.unlink()
+        self._unlink_entry(cache_key)
         
-        if cache_key in self.metadata:
-            del self.metadata[cache_key]
-            self._save_metadata()
+        with self._lock:
+            self._memory.pop(cache_key, None)
+            if cache_key in self.metadata:
+                del self.metadata[cache_key]
+                self._save_metadata()
     
     def clear(self, older_than: Optional[timedelta] = None):
         """
@@ -197,27 +346,31 @@ class CacheManager:
             for cache_file in self.cache_dir.glob("*.*"):
                 if cache_file.name != "cache_metadata.json":
                     cache_file.unlink()
-            self.metadata = {}
-            self._save_metadata()
+            with self._lock:
+                self._memory.clear()
+                self.metadata = {}
+                self._save_metadata()
             logger.info("Cleared all cache entries")
         else:
             # Clear expired entries
             cutoff = datetime.now() - older_than
-            keys_to_delete = []
             
-            for cache_key, metadata in self.metadata.items():
-                cached_time = datetime.fromisoformat(metadata['timestamp'])
-                if cached_time < cutoff:
-                    keys_to_delete.append(cache_key)
-            
-            for cache_key in keys_to_delete:
-                cache_path = self._get_cache_path(cache_key)
-                if cache_path.exists():
-                    cache_path.unlink()
-                del self.metadata[cache_key]
+            with self._lock:
+                keys_to_delete = [
+                    cache_key
+                    for cache_key, metadata in self.metadata.items()
+                    if datetime.fromisoformat(metadata['timestamp']) < cutoff
+                ]
+                
+                for cache_key in keys_to_delete:
+                    self._unlink_entry(cache_key)
+                    self._memory.pop(cache_key, None)
+                    del self.metadata[cache_key]
+                
+                if keys_to_delete:
+                    self._save_metadata()
             
             if keys_to_delete:
-                self._save_metadata()
                 logger.info(f"Cleared {len(keys_to_delete)} expired cache entries")
     
     def get_cache_stats(self) -> Dict:
@@ -0,0 +1,33 @@
+"""
+Configuration loader for YAML config files.
+Parses each file once per process so fetchers can be constructed cheaply.
+"""
+
+from functools import lru_cache
+from typing import Any, Dict
+
+import yaml
+
+# libyaml's C loader is much faster; fall back when PyYAML was built without it
+try:
+    _SafeLoader = yaml.CSafeLoader
+except AttributeError:
+    _SafeLoader = yaml.SafeLoader
+
+
+@lru_cache(maxsize=8)
+def load_config(config_path: str) -> Dict[str, Any]:
+    """
+    Load and cache a YAML configuration file.
+
+    The returned dictionary is shared between callers and must be
+    treated as read-only.
+
+    Args:
+        config_path: Path to YAML configuration file
+
+    Returns:
+        Parsed configuration dictionary
+    """
+    with open(config_path, 'r') as f:
+        return yaml.load(f, Loader=_SafeLoader)
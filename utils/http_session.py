@@ -0,0 +1,87 @@
+"""
+HTTP session factory for data source fetchers.
+Provides pooled keep-alive sessions with automatic retries on transient server errors.
+"""
+
+import json
+from typing import Any, Optional, Sequence, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+# Every content encoding this urllib3 can decode: gzip and deflate, plus br
+# and zstd when the optional brotli/zstandard packages are installed
+from urllib3.util.request import ACCEPT_ENCODING
+
+# orjson decodes several times faster than the stdlib; it is optional
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# (connect, read) timeout in seconds: fail fast on an unreachable host while
+# still allowing slow responses; read applies per socket read, not in total
+DEFAULT_TIMEOUT = (3.05, 15)
+
+
+def create_session(
+    user_agent: Optional[str] = None,
+    pool_connections: int = 10,
+    pool_maxsize: int = 32,
+    max_retries: int = 3,
+    backoff_factor: float = 0.3,
+    status_forcelist: Sequence[int] = (500, 502, 503, 504)
+) -> requests.Session:
+    """
+    Create a requests session with connection pooling and retries.
+
+    Reusing one session keeps TCP/TLS connections alive between calls,
+    so only the first request to a host pays the handshake.
+
+    Args:
+        user_agent: User-Agent header (None = requests default)
+        pool_connections: Number of host connection pools to cache
+        pool_maxsize: Maximum connections kept per host pool
+        max_retries: Maximum number of retries for failed requests
+        backoff_factor: Exponential backoff factor between retries
+        status_forcelist: HTTP status codes that trigger a retry
+
+    Returns:
+        Configured requests session
+    """
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=status_forcelist,
+        # Hand the final response back so callers still see HTTPError
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=retry
+    )
+
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({'Accept-Encoding': ACCEPT_ENCODING})
+    if user_agent:
+        session.headers.update({'User-Agent': user_agent})
+
+    return session
+
+
+def decode_json(content: Union[bytes, str]) -> Any:
+    """
+    Decode a JSON response body.
+
+    Args:
+        content: Raw response body (e.g. response.content)
+
+    Returns:
+        Decoded JSON value
+    """
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
@@ -69,29 +69,33 @@ class F1DatasetLogger:
             console_handler.setFormatter(console_formatter)
             self.logger.addHandler(console_handler)
     
-    def debug(self, message: str, **kwargs):
+    def debug(self, message: str, *args, **kwargs):
         """Log debug message."""
-        self.logger.debug(message, **kwargs)
+        self.logger.debug(message, *args, **kwargs)
     
-    def info(self, message: str, **kwargs):
+    def info(self, message: str, *args, **kwargs):
         """Log info message."""
-        self.logger.info(message, **kwargs)
+        self.logger.info(message, *args, **kwargs)
     
-    def warning(self, message: str, **kwargs):
+    def warning(self, message: str, *args, **kwargs):
         """Log warning message."""
-        self.logger.warning(message, **kwargs)
+        self.logger.warning(message, *args, **kwargs)
     
-    def error(self, message: str, **kwargs):
+    def error(self, message: str, *args, **kwargs):
         """Log error message."""
-        self.logger.error(message, **kwargs)
+        self.logger.error(message, *args, **kwargs)
     
-    def critical(self, message: str, **kwargs):
+    def critical(self, message: str, *args, **kwargs):
         """Log critical message."""
-        self.logger.critical(message, **kwargs)
+        self.logger.critical(message, *args, **kwargs)
     
-    def exception(self, message: str, **kwargs):
+    def exception(self, message: str, *args, **kwargs):
         """Log exception with traceback."""
-        self.logger.exception(message, **kwargs)
+        self.logger.exception(message, *args, **kwargs)
+    
+    def isEnabledFor(self, level: int) -> bool:
+        """Check whether messages at this level would be emitted."""
+        return self.logger.isEnabledFor(level)
 
 
 # Global logger instance
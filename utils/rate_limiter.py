@@ -4,67 +4,146 @@ Prevents exceeding API rate limits and handles retries.
 """
 
 import time
-from typing import Callable, Any, Optional
+import threading
+from typing import Callable, Any, Optional, Dict, List, Mapping
 from functools import wraps
-from datetime import datetime, timedelta
-from collections import defaultdict
 from utils.logger import get_logger
 
 logger = get_logger()
 
 
 class RateLimiter:
-    """Rate limiter for API calls."""
+    """Token-bucket rate limiter for API calls."""
     
     def __init__(
         self,
         max_calls: int = 100,
         period: int = 60,
         retry_delay: float = 1.0,
-        max_retries: int = 3
+        max_retries: int = 3,
+        burst: Optional[float] = None
     ):
         """
         Initialize rate limiter.
         
+        Tokens refill continuously at max_calls / period per second, so the
+        long-run rate matches the configured limit while idle time builds
+        up credit (up to burst tokens) that later calls can spend at once.
+        
         Args:
             max_calls: Maximum number of calls allowed
             period: Time period in seconds
             retry_delay: Delay between retries in seconds
             max_retries: Maximum number of retries for failed requests
+            burst: Bucket capacity in calls (None = one second worth of calls, min 1)
         """
         self.max_calls = max_calls
         self.period = period
         self.retry_delay = retry_delay
         self.max_retries = max_retries
-        self.calls = defaultdict(list)
+        self.rate = max_calls / period
+        self.capacity = burst if burst is not None else max(1.0, self.rate)
+        self._buckets: Dict[str, List[float]] = {}  # key -> [tokens, last_refill]
+        self._lock = threading.Lock()
     
-    def _clean_old_calls(self, key: str):
-        """Remove calls outside the time window."""
-        now = datetime.now()
-        cutoff = now - timedelta(seconds=self.period)
-        self.calls[key] = [
-            call_time for call_time in self.calls[key]
-            if call_time > cutoff
-        ]
+    def _refill(self, key: str) -> List[float]:
+        """Top up the bucket for key based on time elapsed since the last refill."""
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [self.capacity, now]
+        else:
+            bucket[0] = min(self.capacity, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+        return bucket
     
     def _wait_if_needed(self, key: str):
         """Wait if rate limit would be exceeded."""
-        self._clean_old_calls(key)
+        bucket = self._refill(key)
         
-        if len(self.calls[key]) >= self.max_calls:
-            # Calculate wait time
-            oldest_call = min(self.calls[key])
-            wait_until = oldest_call + timedelta(seconds=self.period)
-            wait_seconds = (wait_until - datetime.now()).total_seconds()
-            
-            if wait_seconds > 0:
-                logger.info(f"Rate limit reached for {key}. Waiting {wait_seconds:.2f} seconds...")
-                time.sleep(wait_seconds)
-                self._clean_old_calls(key)
+        if bucket[0] < 1:
+            wait_seconds = (1 - bucket[0]) / self.rate
+            logger.debug(f"Rate limit reached for {key}. Waiting {wait_seconds:.2f} seconds...")
+            time.sleep(wait_seconds)
+            self._refill(key)
     
     def record_call(self, key: str = "default"):
         """Record an API call."""
-        self.calls[key].append(datetime.now())
+        self._refill(key)[0] -= 1
+    
+    def acquire(self, key: str = "default"):
+        """
+        Wait for a free slot and record the call in one step.
+        
+        Safe to call from multiple threads sharing this limiter.
+        
+        Args:
+            key: Rate limit key
+        """
+        with self._lock:
+            self._wait_if_needed(key)
+            self.record_call(key)
+    
+    def acquire_any(self, keys: List[str]) -> str:
+        """
+        Take a slot from whichever key currently has the most capacity.
+        
+        Each key keeps its own bucket, so several hosts sharing one limit
+        (e.g. API mirrors) can be used together without any single host
+        exceeding it.
+        
+        Args:
+            keys: Candidate rate limit keys
+            
+        Returns:
+            The key the call was recorded against
+        """
+        with self._lock:
+            key = max(keys, key=lambda k: self._refill(k)[0])
+            self._wait_if_needed(key)
+            self.record_call(key)
+            return key
+    
+    def pause(self, key: str, seconds: float):
+        """
+        Hold back calls for key for at least the given number of seconds.
+        
+        Empties the bucket so the next token only becomes available once
+        the pause has elapsed; never shortens a longer pending wait.
+        
+        Args:
+            key: Rate limit key
+            seconds: Minimum time until the next call
+        """
+        if seconds <= 0:
+            return
+        with self._lock:
+            bucket = self._refill(key)
+            bucket[0] = min(bucket[0], 1 - seconds * self.rate)
+        logger.debug("Pausing %s for %.2f seconds", key, seconds)
+    
+    def update_from_headers(self, key: str, headers: Mapping[str, str]):
+        """
+        Follow the server's own rate limit hints from a response.
+        
+        Honours Retry-After, and X-RateLimit-Reset once X-RateLimit-Remaining
+        reaches zero, so the limiter adapts when the real limit is tighter
+        than the configured one.
+        
+        Args:
+            key: Rate limit key
+            headers: Response headers
+        """
+        wait = None
+        retry_after = headers.get('Retry-After')
+        if retry_after is not None:
+            wait = _parse_seconds(retry_after)
+        elif headers.get('X-RateLimit-Remaining') == '0':
+            reset = headers.get('X-RateLimit-Reset')
+            if reset is not None:
+                wait = _parse_seconds(reset)
+        if wait:
+            self.pause(key, wait)
     
     def __call__(self, func: Callable) -> Callable:
         """
@@ -78,13 +157,12 @@ class RateLimiter:
         @wraps(func)
         def wrapper(*args, **kwargs):
             key = kwargs.get('rate_limit_key', 'default')
-            self._wait_if_needed(key)
             
             # Retry logic
             last_exception = None
             for attempt in range(self.max_retries):
                 try:
-                    self.record_call(key)
+                    self.acquire(key)
                     result = func(*args, **kwargs)
                     return result
                 except Exception as e:
@@ -104,6 +182,29 @@ class RateLimiter:
         return wrapper
 
 
+def _parse_seconds(value: str) -> Optional[float]:
+    """
+    Parse a rate limit header value as seconds from now.
+    
+    Accepts a delay in seconds or a Unix timestamp (as sent in some
+    X-RateLimit-Reset headers); HTTP-date values are ignored.
+    
+    Args:
+        value: Header value
+        
+    Returns:
+        Seconds to wait, or None if the value cannot be parsed
+    """
+    try:
+        seconds = float(value)
+    except ValueError:
+        return None
+    # Values this large are epoch timestamps rather than delays
+    if seconds > 1e9:
+        seconds -= time.time()
+    return max(0.0, seconds)
+
+
 class APIRateLimiter:
     """Rate limiter configured for specific APIs."""
     
@@ -0,0 +1,67 @@
+"""
+In-flight request coalescing.
+Lets concurrent callers asking for the same resource share one network call.
+"""
+
+import copy
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable
+
+
+class RequestCoalescer:
+    """Shares the result of an in-flight call with identical concurrent calls."""
+
+    def __init__(self, copy_results: bool = True):
+        """
+        Initialize coalescer.
+
+        Args:
+            copy_results: Give each waiting caller a deep copy of the result,
+                so a caller mutating it cannot affect the others. Disable only
+                for results that are meant to be shared
+        """
+        self.copy_results = copy_results
+        self._inflight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def run(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """
+        Run func for key, or wait for the call already running for key.
+
+        The first caller for a key executes func; callers arriving while it
+        is still running block on the same Future and receive its result
+        (or its exception) instead of issuing a duplicate call. Unless
+        copy_results is disabled, those callers get their own deep copy.
+
+        Args:
+            key: Identifier of the request (e.g. URL plus parameters)
+            func: Zero-argument callable performing the request
+
+        Returns:
+            Result of func
+        """
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+
+        if not leader:
+            result = future.result()
+            if self.copy_results:
+                return copy.deepcopy(result)
+            return result
+
+        try:
+            result = func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._inflight[key]